@@ -1,12 +1,19 @@
-# Fernet module is imported from the 
-# cryptography package 
-from cryptography.fernet import Fernet 
+# Fernet module is imported from the
+# cryptography package
+import os
+from cryptography.fernet import Fernet
 
-crypto_key = Fernet.generate_key()
-f = Fernet(crypto_key)
+# The shared cipher is created on first use rather than at import. Set CY350_FERNET_KEY to a
+# Fernet key to give separate processes the same key; otherwise a new key is generated.
+_f = None
 
 def get_key_value():
-    return f
+    global _f
+    if _f is None:
+        crypto_key = os.environ.get('CY350_FERNET_KEY')
+        crypto_key = crypto_key.encode() if crypto_key else Fernet.generate_key()
+        _f = Fernet(crypto_key)
+    return _f
 
-if "__name__" == "__main__":
-    print(get_key_value())
\ No newline at end of file
+if __name__ == "__main__":
+    print(get_key_value())
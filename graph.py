@@ -1,3 +1,5 @@
+from array import array
+
 class Graph:
     """
     Represents a directed, weighted graph used for network routing algorithms. The graph
@@ -6,7 +8,15 @@ class Graph:
 
     Attributes:
         nodes (dict): A dictionary representing the graph structure, where keys are node identifiers
-                      and values are lists of tuples representing edges (destination node, cost, interface).
+                      and values hold the node's outgoing edges as parallel arrays: 'to' (destination
+                      node ids), 'cost' (edge costs), and 'iface' (interface ids).
+        node_ids (dict): Dense integer id of each node, assigned as nodes are added.
+        node_names (list): Node identifier for each dense id.
+        iface_names (list): Interface name for each interface id, assigned as edges are added.
+        indptr (array): CSR row offsets; the edges of node u are at indices indptr[u]:indptr[u + 1].
+        to_idx (array): Destination node id of each edge.
+        cost (array): Cost of each edge.
+        iface_idx (array): Interface id of each edge.
     """
 
     def __init__(self):
@@ -14,6 +24,14 @@ class Graph:
         Initializes an empty graph with no nodes.
         """
         self.nodes = {}
+        self.node_ids = {}
+        self.node_names = []
+        self.iface_names = []
+        self._iface_ids = {}
+        self.indptr = array('i', [0])
+        self.to_idx = array('i')
+        self.cost = array('i')
+        self.iface_idx = array('h')
 
     def add_node(self, node):
         """
@@ -23,7 +41,9 @@ class Graph:
             node (str): The identifier for the node (e.g., a router ID or network address).
         """
         if node not in self.nodes:
-            self.nodes[node] = []
+            self.node_ids[node] = len(self.node_names)
+            self.node_names.append(node)
+            self.nodes[node] = {'to': array('i'), 'cost': array('i'), 'iface': array('h')}
 
     def add_edge(self, from_node, to_node, cost, interface):
         """
@@ -38,5 +58,69 @@ class Graph:
         """
         self.add_node(from_node)  # Ensure the source node exists
         self.add_node(to_node)    # Ensure the destination node exists
-        self.nodes[from_node].append((to_node, cost, interface))
+        edges = self.nodes[from_node]
+        edges['to'].append(self.node_ids[to_node])
+        edges['cost'].append(cost)
+        edges['iface'].append(self.iface_id(interface))
+
+    def iface_id(self, interface):
+        """
+        Returns the small integer id used for an interface name in edge storage, assigning the next
+        free id the first time a name is seen.
+
+        Args:
+            interface (str): The network interface name (e.g., 'Gi0/1').
+
+        Returns:
+            int: The interface id.
+        """
+        iid = self._iface_ids.get(interface)
+        if iid is None:
+            iid = self._iface_ids[interface] = len(self.iface_names)
+            self.iface_names.append(interface)
+        return iid
+
+    def iface_name(self, iid):
+        """
+        Returns the interface name for an interface id.
+
+        Args:
+            iid (int): The interface id.
+
+        Returns:
+            str: The network interface name.
+        """
+        return self.iface_names[iid]
+
+    def edges(self, node):
+        """
+        Yields the outgoing edges of a node as tuples, in the order they were added.
+
+        Args:
+            node (str): The node whose edges are requested.
+
+        Yields:
+            tuple: (destination node, cost, interface) for each edge.
+        """
+        edges = self.nodes[node]
+        for to_id, cost, iid in zip(edges['to'], edges['cost'], edges['iface']):
+            yield self.node_names[to_id], cost, self.iface_names[iid]
+
+    def finalize(self):
+        """
+        Builds a compressed sparse row (CSR) view of the graph as parallel typed arrays, so
+        shortest-path code can walk contiguous integers instead of per-edge Python tuples.
+        The arrays support the buffer protocol and can be wrapped by NumPy without copying.
+        Call again after adding edges to rebuild the view.
+        """
+        self.indptr = array('i', [0])
+        self.to_idx = array('i')
+        self.cost = array('i')
+        self.iface_idx = array('h')
 
+        for node in self.node_names:
+            edges = self.nodes[node]
+            self.to_idx.extend(edges['to'])
+            self.cost.extend(edges['cost'])
+            self.iface_idx.extend(edges['iface'])
+            self.indptr.append(len(self.to_idx))
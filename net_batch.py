@@ -0,0 +1,180 @@
+import sys
+import ctypes
+import ctypes.util
+import errno
+import socket
+
+MSG_DONTWAIT = 0x40  # Linux value; recvmmsg and sendmmsg are only bound on Linux
+
+class _IOVec(ctypes.Structure):
+    _fields_ = [('iov_base', ctypes.c_void_p),
+                ('iov_len', ctypes.c_size_t)]
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [('msg_name', ctypes.c_void_p),
+                ('msg_namelen', ctypes.c_uint32),
+                ('msg_iov', ctypes.POINTER(_IOVec)),
+                ('msg_iovlen', ctypes.c_size_t),
+                ('msg_control', ctypes.c_void_p),
+                ('msg_controllen', ctypes.c_size_t),
+                ('msg_flags', ctypes.c_int)]
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [('msg_hdr', _MsgHdr),
+                ('msg_len', ctypes.c_uint)]
+
+class _SockAddrIn(ctypes.Structure):
+    _fields_ = [('sin_family', ctypes.c_ushort),
+                ('sin_port', ctypes.c_uint16),
+                ('sin_addr', ctypes.c_ubyte * 4),
+                ('sin_zero', ctypes.c_ubyte * 8)]
+
+_libc_recvmmsg = None
+_libc_sendmmsg = None
+if sys.platform.startswith('linux'):
+    try:
+        _libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        _libc_recvmmsg = _libc.recvmmsg
+        _libc_recvmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(_MMsgHdr), ctypes.c_uint, ctypes.c_int, ctypes.c_void_p]
+        _libc_recvmmsg.restype = ctypes.c_int
+        _libc_sendmmsg = _libc.sendmmsg
+        _libc_sendmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(_MMsgHdr), ctypes.c_uint, ctypes.c_int]
+        _libc_sendmmsg.restype = ctypes.c_int
+    except (OSError, AttributeError):
+        _libc_recvmmsg = None
+        _libc_sendmmsg = None
+
+
+class RecvBuffers:
+    """
+    Receive buffers and message headers for recvmmsg, allocated once and reused by every call
+    that is given them. Calls sharing one RecvBuffers must not overlap, so keep one per thread.
+
+    Attributes:
+        n (int): Maximum number of datagrams received per call.
+        bufsize (int): Maximum size of each datagram.
+    """
+
+    def __init__(self, n=32, bufsize=1500):
+        """
+        Allocates the buffers and wires each message header to its buffer and address slot.
+
+        Args:
+            n (int): Maximum number of datagrams to receive per call (default: 32).
+            bufsize (int): Maximum size of each datagram (default: 1500 bytes).
+        """
+        self.n = n
+        self.bufsize = bufsize
+        self.fallback = bytearray(bufsize)  # Used with recvfrom_into where recvmmsg is unavailable
+        if _libc_recvmmsg is None:
+            return
+
+        self.bufs = (ctypes.c_char * bufsize * n)()
+        self.addrs = (_SockAddrIn * n)()
+        self.iovecs = (_IOVec * n)()
+        self.hdrs = (_MMsgHdr * n)()
+        for i in range(n):
+            self.iovecs[i].iov_base = ctypes.addressof(self.bufs[i])
+            self.iovecs[i].iov_len = bufsize
+            self.hdrs[i].msg_hdr.msg_name = ctypes.addressof(self.addrs[i])
+            self.hdrs[i].msg_hdr.msg_iov = ctypes.pointer(self.iovecs[i])
+            self.hdrs[i].msg_hdr.msg_iovlen = 1
+
+
+def recvmmsg(sock, n=32, bufsize=1500, buffers=None):
+    """
+    Drains up to n waiting datagrams from a socket with a single recvmmsg(2) system call.
+    Never blocks: callers are expected to wait for readability first. On platforms without
+    recvmmsg, falls back to a single recvfrom_into.
+
+    Args:
+        sock (socket.socket): An AF_INET datagram or raw socket.
+        n (int): Maximum number of datagrams to receive (default: 32).
+        bufsize (int): Maximum size of each datagram (default: 1500 bytes).
+        buffers (RecvBuffers): Preallocated buffers to receive into; n and bufsize are then taken
+                               from them (default: None, allocate buffers for this call).
+
+    Returns:
+        list: (data, address) tuples in arrival order, empty if nothing was waiting.
+
+    Raises:
+        OSError: If the receive fails for any reason other than no data being available.
+    """
+    if buffers is None:
+        buffers = RecvBuffers(n, bufsize)
+
+    if _libc_recvmmsg is None:
+        try:
+            nbytes, address = sock.recvfrom_into(buffers.fallback)
+        except BlockingIOError:
+            return []
+        return [(bytes(buffers.fallback[:nbytes]), address)]
+
+    hdrs = buffers.hdrs
+    for i in range(buffers.n):
+        hdrs[i].msg_hdr.msg_namelen = ctypes.sizeof(_SockAddrIn)  # Reset; the kernel overwrites it
+
+    received = _libc_recvmmsg(sock.fileno(), hdrs, buffers.n, MSG_DONTWAIT, None)
+    if received < 0:
+        err = ctypes.get_errno()
+        if err in (errno.EAGAIN, errno.EWOULDBLOCK):
+            return []
+        raise OSError(err, f'recvmmsg failed: {errno.errorcode.get(err, err)}')
+
+    # Copy each datagram out once, at its received length, so the buffers can be reused
+    addrs = buffers.addrs
+    return [(ctypes.string_at(buffers.bufs[i], hdrs[i].msg_len),
+             (socket.inet_ntoa(bytes(addrs[i].sin_addr)), socket.ntohs(addrs[i].sin_port)))
+            for i in range(received)]
+
+
+def sendmmsg(sock, datagrams):
+    """
+    Sends several datagrams with a single sendmmsg(2) system call. The kernel may accept only
+    part of the batch, in which case the rest is resubmitted until every datagram is sent.
+    On platforms without sendmmsg, falls back to one sendto per datagram.
+
+    Args:
+        sock (socket.socket): An AF_INET datagram or raw socket.
+        datagrams (list): (data, address) tuples, where address is a (host, port) pair.
+
+    Returns:
+        int: The number of datagrams sent.
+
+    Raises:
+        OSError: If the send fails.
+    """
+    if _libc_sendmmsg is None:
+        for data, address in datagrams:
+            sock.sendto(data, address)
+        return len(datagrams)
+
+    n = len(datagrams)
+    if n == 0:
+        return 0
+
+    payloads = [ctypes.c_char_p(bytes(data)) for data, _ in datagrams]  # Keeps the buffers alive for the call
+    addrs = (_SockAddrIn * n)()
+    iovecs = (_IOVec * n)()
+    hdrs = (_MMsgHdr * n)()
+    for i, (data, (host, port)) in enumerate(datagrams):
+        addrs[i].sin_family = socket.AF_INET
+        addrs[i].sin_port = socket.htons(port)
+        addrs[i].sin_addr[:] = socket.inet_aton(host)
+        iovecs[i].iov_base = ctypes.cast(payloads[i], ctypes.c_void_p)
+        iovecs[i].iov_len = len(data)
+        hdrs[i].msg_hdr.msg_name = ctypes.addressof(addrs[i])
+        hdrs[i].msg_hdr.msg_namelen = ctypes.sizeof(_SockAddrIn)
+        hdrs[i].msg_hdr.msg_iov = ctypes.pointer(iovecs[i])
+        hdrs[i].msg_hdr.msg_iovlen = 1
+
+    total = 0
+    while total < n:
+        sent = _libc_sendmmsg(sock.fileno(), ctypes.byref(hdrs[total]), n - total, 0)
+        if sent < 0:
+            err = ctypes.get_errno()
+            if err == errno.EINTR:
+                continue
+            raise OSError(err, f'sendmmsg failed after {total} of {n} datagrams: {errno.errorcode.get(err, err)}')
+        total += sent
+    return total
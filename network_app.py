@@ -1,62 +1,137 @@
 import threading
-import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from tcp_client import Client
-from router import Router
+from router import Router, log_listener_paused
 from tcp_server import Server
+from graph_jit import warm_up
+
+# Router IDs in dotted-decimal form ('1.1.1.1', '2.2.2.2', ...), indexed by router number - 1
+_ROUTER_IDS = tuple(f'{i}.{i}.{i}.{i}' for i in range(1, 9))
+
+# Routers handed to worker processes. Routers own sockets and cannot be pickled, so workers are
+# forked and look their router up here by index.
+_routers = []
+
+def _run_router(index):
+    """
+    Runs a router's datagram processing loop inside a worker process.
+
+    Args:
+        index (int): Position of the router in the application's router list.
+
+    Returns:
+        dict: The router's final forwarding table, for the parent process to record.
+    """
+    router = _routers[index]
+    router.process_datagrams()
+    return router.forwarding_table
+
+def _prime_worker():
+    """
+    Does nothing; submitting it makes the pool fork its workers.
+    """
 
 class NetworkApp:
     """
     Represents a network application that simulates a network of routers, a web server, 
     and a client interacting in a network environment. The application uses threads to 
     manage the concurrent activities of routers processing datagrams and the server-client interaction.
+    Routers can instead run in separate processes so that their loops do not share the GIL.
 
     Attributes:
         routers (list): A list of `Router` objects that form the network.
+        use_processes (bool): Whether routers run in worker processes instead of threads.
         web_server (Server): The web server instance that responds to client requests.
         svr_thread (threading.Thread): A thread to run the server concurrently.
         web_client (Client): The client instance that sends requests to the server.
     """
 
-    def __init__(self, router_data):
+    def __init__(self, router_data, use_processes=False):
         """
         Initializes the NetworkApp with a set of routers and a server.
 
         Args:
             router_data (list): A list of tuples containing interface and direct connection data for each router.
+            use_processes (bool): Run each router in its own forked worker process (default: False, one thread per router).
         """
+        # Compile the shortest path routine up front so the first route computation isn't delayed
+        warm_up()
+
         self.routers = []
         router_id = 1
 
         # Create Router instances
         for interfaces, direct_connections in router_data:
-            self.routers.append(Router(f'{router_id}.{router_id}.{router_id}.{router_id}', interfaces, direct_connections))
+            self.routers.append(Router(_ROUTER_IDS[router_id - 1], interfaces, direct_connections))
             router_id += 1
         print('The routers have been created!')
 
+        # Routers already talk over real sockets, so they work unchanged across processes. The
+        # convergence events are swapped for process-shared ones before the workers fork.
+        self.use_processes = use_processes
+        self._pool = None
+        if self.use_processes:
+            mp_context = multiprocessing.get_context('fork')
+            for router in self.routers:
+                router.converged = mp_context.Event()
+            _routers[:] = self.routers
+            self._pool = ProcessPoolExecutor(max_workers=len(self.routers), mp_context=mp_context)
+            # A thread holding a lock when the process forks leaves that lock held forever in the
+            # child, so every worker is forked here, before the server threads start and with the
+            # log listener paused. A fork-context pool forks all its workers on the first submit.
+            with log_listener_paused():
+                self._pool.submit(_prime_worker).result()
+
         # Create and run the server in a separate thread
         self.web_server = Server()
         self.svr_thread = threading.Thread(target=self.web_server.run_server)
         self.svr_thread.start()
+        self.web_server.ready.wait()
 
         print('The web server is running!')
 
+    def join_routers(self, router_threads, router_jobs):
+        """
+        Waits for every router to finish processing datagrams. Routers that ran in worker processes
+        report back their forwarding tables, which are copied onto the local router objects.
+
+        Args:
+            router_threads (list): Threads running routers in this process.
+            router_jobs (list): Futures for routers running in worker processes, in router order.
+        """
+        for thread in router_threads:
+            thread.join()
+        for router, job in zip(self.routers, router_jobs):
+            router.forwarding_table = job.result()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            for router in self.routers:
+                router.shutdown()  # Close this process's copies of the forked sockets
+
     def run_app(self):
         """
         Runs the network application, which includes starting routers, sending link-state advertisements,
         creating a client to request resources, and handling server-client interaction.
         """
-        # Start routers in separate threads
+        # Start routers in separate threads or worker processes
         router_threads = []
-        for router in self.routers:
-            rtr_thread = threading.Thread(target=router.process_datagrams)
-            router_threads.append(rtr_thread)
-            rtr_thread.start()
+        router_jobs = []
+        if self.use_processes:
+            router_jobs = [self._pool.submit(_run_router, index) for index in range(len(self.routers))]
+        else:
+            for router in self.routers:
+                rtr_thread = threading.Thread(target=router.process_datagrams)
+                router_threads.append(rtr_thread)
+                rtr_thread.start()
 
         # Routers send initial link-state advertisements
         for router in self.routers:
             router.send_initial_lsa()
 
-        time.sleep(10)  # Allow routers time to exchange LSAs and update their forwarding tables
+        # Wait for every router to finish exchanging LSAs and build its forwarding table
+        for router in self.routers:
+            router.converged.wait(timeout=30)
         print('Routers are ready.')
 
         # Create and run the client
@@ -73,13 +148,11 @@ class NetworkApp:
             self.web_client.request_resource('/index.html')
             print('The web client has requested and received the resource.')
 
-            time.sleep(60)  # Allow routers and client to complete processing
-
-            # Ensure all router threads finish their tasks
-            for thread in router_threads:
-                thread.join()
+            # Ensure all routers finish their tasks
+            self.join_routers(router_threads, router_jobs)
 
-            # Shut down the server and close sockets
+            # Shut down the server once it has finished responding, and close sockets
+            self.web_server.finished.wait(timeout=30)
             self.web_server.close_server()
             print('The network application is shutdown!')
         elif choice == 'POST' or choice == 'post':
@@ -98,24 +171,18 @@ class NetworkApp:
             #self.web_client.request_resource('/new_resource.html')
             #print('The web client has requested and received the resource.')
 
-            time.sleep(1)  # Allow routers and client to complete processing
+            # Ensure all routers finish their tasks
+            self.join_routers(router_threads, router_jobs)
 
-            # Ensure all router threads finish their tasks
-            for thread in router_threads:
-                thread.join()
-
-            # Shut down the server and close sockets
+            # Shut down the server once it has finished responding, and close sockets
+            self.web_server.finished.wait(timeout=30)
             self.web_server.close_server()
             print('The network application is shutdown!')
         else:
+            # Ensure all routers finish their tasks
+            self.join_routers(router_threads, router_jobs)
 
-            time.sleep(1)  # Allow routers and client to complete processing
-
-            # Ensure all router threads finish their tasks
-            for thread in router_threads:
-                thread.join()
-
-            # Shut down the server and close sockets
+            # No request was made, so shut down the server and close sockets right away
             self.web_server.close_server()
             print('The network application is shutdown!')
 
@@ -1,5 +1,41 @@
 import socket
 import struct
+from collections import namedtuple
+from functools import lru_cache
+
+# Precompiled wire formats for the IP header, the LSA header, and the TCP-like header (with next hop)
+_IP_HDR = struct.Struct('!BBHHHBBH4s4s')
+_LSA_HDR = struct.Struct('!4sH')
+_TCP_HDR = struct.Struct('!HHLLBBHHH4s')
+_HTTP_HDR = struct.Struct('!BBHHHBBH4s4sHHLLBBHHH4s')  # IP and TCP-like headers together, for one-pass header parsing
+
+# Byte offsets of the source and destination addresses in a serialized datagram, for patching
+# copies in place and for peeking at addresses without a parse
+IP_SADDR_OFFSET = 12
+IP_DADDR_OFFSET = 16
+
+# The simulated network uses a small, fixed set of addresses, so address conversions are memoized
+_aton = lru_cache(maxsize=512)(socket.inet_aton)
+_ntoa = lru_cache(maxsize=512)(socket.inet_ntoa)
+
+def _parse_ip(data):
+    """
+    Unpacks the 20-byte IP header at the start of a datagram in a single pass.
+
+    Args:
+        data (bytes): The byte sequence beginning with an IP header.
+
+    Returns:
+        tuple: (ip_ver, ip_ihl, ip_tos, ip_tot_len, ip_id, ip_frag_off, ip_ttl, ip_proto, ip_check,
+                source_ip, dest_ip), with both addresses left in their packed 4-byte form.
+
+    Raises:
+        struct.error: If the byte data is invalid.
+    """
+    ip_ihl_ver, ip_tos, ip_tot_len, ip_id, ip_frag_off, ip_ttl, ip_proto, ip_check, ip_saddr, ip_daddr = _IP_HDR.unpack_from(data, 0)
+    return ((ip_ihl_ver >> 4) & 0xF, ip_ihl_ver & 0xF, ip_tos, ip_tot_len, ip_id, ip_frag_off,
+            ip_ttl, ip_proto, ip_check, ip_saddr, ip_daddr)
+
 
 class IPHeader:
     """
@@ -16,10 +52,13 @@ class IPHeader:
         ip_ttl (int): Time to Live (default: 255).
         ip_proto (int): Protocol used (default: socket.IPPROTO_RAW).
         ip_check (int): Checksum (initially 0, calculated by the kernel).
-        ip_saddr (str): Source IP address (default: '127.0.0.2').
-        ip_daddr (str): Destination IP address (default: '127.128.0.1').
+        ip_saddr (str): Source IP address (default: '127.0.0.2'), stored in its 4-byte wire form.
+        ip_daddr (str): Destination IP address (default: '127.128.0.1'), stored in its 4-byte wire form.
     """
 
+    __slots__ = ('ip_ver', 'ip_ihl', 'ip_tos', 'ip_tot_len', 'ip_id', 'ip_frag_off', 'ip_ttl', 'ip_proto', 'ip_check',
+                 '_saddr_raw', '_daddr_raw')
+
     def __init__(self, ip_ver=4, ip_ihl=5, ip_tos=0, ip_tot_len=40, ip_id=0, ip_frag_off=0, 
                  ip_ttl=255, ip_proto=socket.IPPROTO_RAW, ip_check=0, source_ip='127.0.0.2', dest_ip='127.128.0.1'):
         """
@@ -35,8 +74,8 @@ class IPHeader:
             ip_ttl (int): Time to Live.
             ip_proto (int): Protocol used.
             ip_check (int): Checksum.
-            source_ip (str): Source IP address.
-            dest_ip (str): Destination IP address.
+            source_ip (str | bytes): Source IP address, dotted-decimal or 4-byte packed.
+            dest_ip (str | bytes): Destination IP address, dotted-decimal or 4-byte packed.
         """
         self.ip_ver = ip_ver
         self.ip_ihl = ip_ihl
@@ -47,8 +86,37 @@ class IPHeader:
         self.ip_ttl = ip_ttl
         self.ip_proto = ip_proto
         self.ip_check = ip_check
-        self.ip_saddr = source_ip
-        self.ip_daddr = dest_ip
+        self._saddr_raw = source_ip if isinstance(source_ip, bytes) else _aton(source_ip)
+        self._daddr_raw = dest_ip if isinstance(dest_ip, bytes) else _aton(dest_ip)
+
+    @property
+    def ip_saddr(self):
+        """
+        str: Source IP address in dotted-decimal form.
+        """
+        return _ntoa(self._saddr_raw)
+
+    @ip_saddr.setter
+    def ip_saddr(self, value):
+        self._saddr_raw = value if isinstance(value, bytes) else _aton(value)
+
+    @property
+    def ip_daddr(self):
+        """
+        str: Destination IP address in dotted-decimal form.
+        """
+        return _ntoa(self._daddr_raw)
+
+    @ip_daddr.setter
+    def ip_daddr(self, value):
+        self._daddr_raw = value if isinstance(value, bytes) else _aton(value)
+
+    @property
+    def ip_daddr_int(self):
+        """
+        int: Destination IP address as a 32-bit integer, read straight from its wire form.
+        """
+        return int.from_bytes(self._daddr_raw, 'big')
 
     @classmethod
     def from_bytes(cls, data):
@@ -64,29 +132,19 @@ class IPHeader:
         Raises:
             struct.error: If the byte data is invalid.
         """
-        unpacked_ip_header = struct.unpack('!BBHHHBBH4s4s', data[0:20])
-
-        ip_ihl_ver = unpacked_ip_header[0]
-        ip_ver = (ip_ihl_ver >> 4) & 0xF
-        ip_ihl = ip_ihl_ver & 0xF
-        ip_tos = unpacked_ip_header[1]
-        ip_tot_len = unpacked_ip_header[2]
-        ip_id = unpacked_ip_header[3]
-        ip_frag_off = unpacked_ip_header[4]
-        ip_ttl = unpacked_ip_header[5]
-        ip_proto = unpacked_ip_header[6]
-        ip_check = unpacked_ip_header[7]
-        ip_saddr = socket.inet_ntoa(unpacked_ip_header[8])
-        ip_daddr = socket.inet_ntoa(unpacked_ip_header[9])
-
-        return cls(ip_ver, ip_ihl, ip_tos, ip_tot_len, ip_id, ip_frag_off, ip_ttl, ip_proto, ip_check, ip_saddr, ip_daddr)
+        return cls(*_parse_ip(data))
 
 
 class LSADatagram(IPHeader):
     """
     Represents an LSA (Link-State Advertisement) datagram that extends an IPHeader.
+
+    LSAs are flooded unchanged to several neighbors, so the serialized form is cached
+    after the first call to to_bytes and discarded whenever any attribute is assigned.
     """
 
+    __slots__ = ('adv_rtr', 'lsa_seq_num', '_lsa_data_bytes', '_bytes_cache')
+
     def __init__(self, ip_ver=4, ip_ihl=5, ip_tos=0, ip_tot_len=40, ip_id=0, ip_frag_off=0, 
                  ip_ttl=255, ip_proto=socket.IPPROTO_RAW, ip_check=0, source_ip='127.0.0.2', 
                  dest_ip='127.128.0.1', adv_rtr='1.1.1.1', lsa_seq_num=0, lsa_data=''):
@@ -96,12 +154,37 @@ class LSADatagram(IPHeader):
         Args:
             adv_rtr (str): Advertising router address.
             lsa_seq_num (int): LSA sequence number.
-            lsa_data (str): LSA data.
+            lsa_data (str | bytes): LSA data, as text or already encoded.
         """
         super().__init__(ip_ver, ip_ihl, ip_tos, ip_tot_len, ip_id, ip_frag_off, ip_ttl, ip_proto, ip_check, source_ip, dest_ip)
         self.adv_rtr = adv_rtr
         self.lsa_seq_num = lsa_seq_num
         self.lsa_data = lsa_data
+        self._bytes_cache = None
+
+    @property
+    def lsa_data(self):
+        """
+        str: LSA data. Stored encoded and only decoded when read.
+        """
+        return self._lsa_data_bytes.decode()
+
+    @lsa_data.setter
+    def lsa_data(self, value):
+        self._lsa_data_bytes = value.encode() if isinstance(value, str) else bytes(value)
+
+    @property
+    def lsa_data_bytes(self):
+        """
+        bytes: LSA data in its encoded wire form.
+        """
+        return self._lsa_data_bytes
+
+    def __setattr__(self, name, value):
+        # Any field change invalidates the cached serialized form
+        if name != '_bytes_cache':
+            super().__setattr__('_bytes_cache', None)
+        super().__setattr__(name, value)
 
     def to_bytes(self):
         """
@@ -110,14 +193,19 @@ class LSADatagram(IPHeader):
         Returns:
             bytes: The byte sequence representing the LSADatagram.
         """
-        lsa_header = struct.pack('!4sH', socket.inet_aton(self.adv_rtr), self.lsa_seq_num)
-        ip_ihl_ver = (self.ip_ver << 4) + self.ip_ihl
-        ip_header = struct.pack('!BBHHHBBH4s4s',
-                                ip_ihl_ver, self.ip_tos, self.ip_tot_len, self.ip_id, self.ip_frag_off,
-                                self.ip_ttl, self.ip_proto, self.ip_check,
-                                socket.inet_aton(self.ip_saddr), socket.inet_aton(self.ip_daddr))
-
-        return ip_header + lsa_header + self.lsa_data.encode()
+        if self._bytes_cache is None:
+            # Pack both headers and the payload into a single preallocated buffer
+            payload = self._lsa_data_bytes
+            buf = bytearray(_IP_HDR.size + _LSA_HDR.size + len(payload))
+            ip_ihl_ver = (self.ip_ver << 4) + self.ip_ihl
+            _IP_HDR.pack_into(buf, 0, ip_ihl_ver, self.ip_tos, self.ip_tot_len, self.ip_id, self.ip_frag_off,
+                              self.ip_ttl, self.ip_proto, self.ip_check,
+                              self._saddr_raw, self._daddr_raw)
+            _LSA_HDR.pack_into(buf, _IP_HDR.size, _aton(self.adv_rtr), self.lsa_seq_num)
+            buf[_IP_HDR.size + _LSA_HDR.size:] = payload
+            self._bytes_cache = bytes(buf)
+
+        return self._bytes_cache
 
     @classmethod
     def from_bytes(cls, data):
@@ -133,15 +221,16 @@ class LSADatagram(IPHeader):
         Raises:
             struct.error: If the byte data is invalid.
         """
-        ip_header = IPHeader.from_bytes(data)
-        adv_rtr, lsa_seq_num = struct.unpack('!4sH', data[20:26])
-        lsa_data = data[26:].decode()
+        adv_rtr, lsa_seq_num = _LSA_HDR.unpack_from(data, 20)
+        lsa_data = data[26:]  # Left encoded; decoded only if lsa_data is read
+
+        return cls(*_parse_ip(data), adv_rtr=_ntoa(adv_rtr), lsa_seq_num=lsa_seq_num, lsa_data=lsa_data)
 
-        return cls(ip_ver=ip_header.ip_ver, ip_ihl=ip_header.ip_ihl, ip_tos=ip_header.ip_tos,
-                   ip_tot_len=ip_header.ip_tot_len, ip_id=ip_header.ip_id, ip_frag_off=ip_header.ip_frag_off,
-                   ip_ttl=ip_header.ip_ttl, ip_proto=ip_header.ip_proto, ip_check=ip_header.ip_check,
-                   source_ip=ip_header.ip_saddr, dest_ip=ip_header.ip_daddr, adv_rtr=socket.inet_ntoa(adv_rtr),
-                   lsa_seq_num=lsa_seq_num, lsa_data=lsa_data)
+
+# Addressing and control fields of an HTTPDatagram, with addresses in packed 4-byte form and the
+# offset at which the payload starts
+HTTPHeaderFields = namedtuple('HTTPHeaderFields', ['ip_saddr', 'ip_daddr', 'source_port', 'dest_port', 'seq_num',
+                                                   'ack_num', 'flags', 'window_size', 'next_hop', 'payload_offset'])
 
 
 class HTTPDatagram(IPHeader):
@@ -149,6 +238,14 @@ class HTTPDatagram(IPHeader):
     Represents an HTTP datagram that extends an IPHeader with TCP-like attributes.
     """
 
+    __slots__ = ('source_port', 'dest_port', 'seq_num', 'ack_num', 'data_offset', 'reserved', 'flags',
+                 'window_size', 'checksum', 'urgent_pointer', 'next_hop', 'data')
+
+    SEQ_NUM_OFFSET = 24  # Byte offset of the sequence number (followed by the acknowledgment number)
+    FLAGS_OFFSET = 33  # Byte offset of the flags byte
+    NEXT_HOP_OFFSET = 40  # Byte offset of the packed next hop address in a serialized datagram
+    PAYLOAD_OFFSET = 44  # Byte offset of the payload, just past both headers
+
     def __init__(self, ip_ver=4, ip_ihl=5, ip_tos=0, ip_tot_len=40, ip_frag_off=0, 
                  ip_ttl=255, ip_proto=socket.IPPROTO_RAW, ip_check=0, source_ip='127.0.0.2', dest_ip='127.128.0.1',
                  source_port=18000, dest_port=8080, seq_num=0, ack_num=0, data_offset=5, 
@@ -168,7 +265,7 @@ class HTTPDatagram(IPHeader):
             checksum (int): TCP checksum.
             urgent_pointer (int): Urgent pointer.
             next_hop (str): Next hop address.
-            data (str): Data payload.
+            data (str | bytes-like): Data payload, as text or already encoded (e.g. a memoryview slice).
         """
         super().__init__(ip_ver, ip_ihl, ip_tos, ip_tot_len, 0, ip_frag_off, ip_ttl, ip_proto, ip_check, source_ip, dest_ip)
         self.source_port = source_port
@@ -191,36 +288,38 @@ class HTTPDatagram(IPHeader):
         Returns:
             bytes: The byte sequence representing the HTTPDatagram.
         """
-        # Pack the TCP header (along with next hop)
-        data_offset_reserved = (self.data_offset << 4) + self.reserved
-        tcp_header = struct.pack('!HHLLBBHHH4s',
-                                 self.source_port,
-                                 self.dest_port,
-                                 self.seq_num,
-                                 self.ack_num,
-                                 data_offset_reserved,
-                                 self.flags,
-                                 self.window_size,
-                                 self.checksum,
-                                 self.urgent_pointer,
-                                 socket.inet_aton(self.next_hop))
-        
-        # Pack the IP header
+        # Pack the IP header, the TCP header (along with next hop), and the payload into one buffer
+        payload = self.data.encode() if isinstance(self.data, str) else self.data
+        buf = bytearray(_IP_HDR.size + _TCP_HDR.size + len(payload))
+
         ip_ihl_ver = (self.ip_ver << 4) + self.ip_ihl
-        ip_header = struct.pack('!BBHHHBBH4s4s',
-                                ip_ihl_ver,
-                                self.ip_tos,
-                                self.ip_tot_len,
-                                0,  # IP ID set to 0 for now
-                                self.ip_frag_off,
-                                self.ip_ttl,
-                                self.ip_proto,
-                                self.ip_check,
-                                socket.inet_aton(self.ip_saddr),
-                                socket.inet_aton(self.ip_daddr))
-
-        # Combine IP header, TCP header, and the payload (data)
-        return ip_header + tcp_header + self.data.encode()
+        _IP_HDR.pack_into(buf, 0,
+                          ip_ihl_ver,
+                          self.ip_tos,
+                          self.ip_tot_len,
+                          0,  # IP ID set to 0 for now
+                          self.ip_frag_off,
+                          self.ip_ttl,
+                          self.ip_proto,
+                          self.ip_check,
+                          self._saddr_raw,
+                          self._daddr_raw)
+
+        data_offset_reserved = (self.data_offset << 4) + self.reserved
+        _TCP_HDR.pack_into(buf, _IP_HDR.size,
+                           self.source_port,
+                           self.dest_port,
+                           self.seq_num,
+                           self.ack_num,
+                           data_offset_reserved,
+                           self.flags,
+                           self.window_size,
+                           self.checksum,
+                           self.urgent_pointer,
+                           _aton(self.next_hop))
+
+        buf[_IP_HDR.size + _TCP_HDR.size:] = payload
+        return bytes(buf)
 
     @classmethod
     def from_bytes(cls, data):
@@ -228,7 +327,8 @@ class HTTPDatagram(IPHeader):
         Parses a bytes object into an HTTPDatagram.
 
         Args:
-            data (bytes): The byte sequence containing the HTTPDatagram.
+            data (bytes): The byte sequence containing the HTTPDatagram (any bytes-like object, such as a
+                          memoryview over a receive buffer).
 
         Returns:
             HTTPDatagram: An instance of HTTPDatagram created from the bytes.
@@ -236,24 +336,11 @@ class HTTPDatagram(IPHeader):
         Raises:
             struct.error: If the byte data is invalid.
         """
-        # Unpack IP header
-        unpacked_ip_header = struct.unpack('!BBHHHBBH4s4s', data[0:20])
-
-        ip_ihl_ver = unpacked_ip_header[0]
-        ip_tos = unpacked_ip_header[1]
-        ip_tot_len = unpacked_ip_header[2]
-        ip_frag_off = unpacked_ip_header[4]
-        ip_ttl = unpacked_ip_header[5]
-        ip_proto = unpacked_ip_header[6]
-        ip_check = unpacked_ip_header[7]
-        ip_saddr = socket.inet_ntoa(unpacked_ip_header[8])
-        ip_daddr = socket.inet_ntoa(unpacked_ip_header[9])
-
-        ip_ver = (ip_ihl_ver >> 4) & 0xF
-        ip_ihl = ip_ihl_ver & 0xF
+        # Unpack IP header (the IP ID is not carried by HTTPDatagram)
+        ip_ver, ip_ihl, ip_tos, ip_tot_len, _, ip_frag_off, ip_ttl, ip_proto, ip_check, ip_saddr, ip_daddr = _parse_ip(data)
 
         # Unpack TCP header
-        unpacked_tcp_header = struct.unpack('!HHLLBBHHH4s', data[20:44])
+        unpacked_tcp_header = _TCP_HDR.unpack_from(data, 20)
 
         source_port = unpacked_tcp_header[0]
         dest_port = unpacked_tcp_header[1]
@@ -264,14 +351,33 @@ class HTTPDatagram(IPHeader):
         window_size = unpacked_tcp_header[6]
         checksum = unpacked_tcp_header[7]
         urgent_pointer = unpacked_tcp_header[8]
-        next_hop = socket.inet_ntoa(unpacked_tcp_header[9])
+        next_hop = _ntoa(unpacked_tcp_header[9])
 
         data_offset = (data_offset_reserved >> 4) & 0xF
         reserved = data_offset_reserved & 0xF
 
-        # Extract the payload data
-        data = data[44:].decode()
+        # Extract the payload data, slicing a memoryview so the payload bytes are not copied before decoding
+        data = str(memoryview(data)[44:], 'utf-8')
 
         return cls(ip_ver, ip_ihl, ip_tos, ip_tot_len, ip_frag_off, ip_ttl, ip_proto, ip_check, ip_saddr, ip_daddr,
                    source_port, dest_port, seq_num, ack_num, data_offset, reserved, flags, window_size,
-                   checksum, urgent_pointer, next_hop, data)
\ No newline at end of file
+                   checksum, urgent_pointer, next_hop, data)
+
+    @staticmethod
+    def header_only_from_bytes(data):
+        """
+        Parses only the headers of a serialized HTTPDatagram with a single unpack, leaving the
+        payload untouched, for code that routes datagrams without reading their data.
+
+        Args:
+            data (bytes): The byte sequence containing the HTTPDatagram (any bytes-like object).
+
+        Returns:
+            HTTPHeaderFields: The addressing and control fields and the payload offset.
+
+        Raises:
+            struct.error: If the byte data is too short to hold the headers.
+        """
+        fields = _HTTP_HDR.unpack_from(data, 0)
+        return HTTPHeaderFields(fields[8], fields[9], fields[10], fields[11], fields[12], fields[13],
+                                fields[15], fields[16], fields[19], _HTTP_HDR.size)
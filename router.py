@@ -1,8 +1,88 @@
+import os
+import re
 import time
+import queue
+import atexit
+import selectors
+import threading
 import socket
 import logging
-from pdu import IPHeader, LSADatagram, HTTPDatagram
+import multiprocessing.util
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+from pdu import IPHeader, LSADatagram, HTTPDatagram, IP_SADDR_OFFSET
 from graph import Graph
+from graph_jit import dijkstra_csr
+from net_batch import RecvBuffers, recvmmsg, sendmmsg
+
+# One 'neighbor, cost, interface' entry of an LSA payload; entries are separated by CRLF
+_LSA_RE = re.compile(rb'\s*([^,\s]+)\s*,\s*(\d+)\s*,\s*([^,\s]+)')
+
+# LSAs are sent to 224.0.0.5 (AllSPFRouters); received destinations are compared as integers
+_LSA_MCAST_INT = 0xE0000005
+
+# Log records are queued by router threads and written to the log file by a listener thread
+_log_listener = None
+
+def _start_log_listener():
+    """
+    Configures logging once per process: the root logger gets a QueueHandler, so logging on a
+    router thread only enqueues the record, and a QueueListener thread writes the log file.
+    """
+    global _log_listener
+    if _log_listener is not None:
+        return
+    file_handler = logging.FileHandler('network_app_router.log', mode='w')
+    file_handler.setFormatter(logging.Formatter('%(levelname)s - %(message)s'))
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))  # The file handler adds the level
+    logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
+    _log_listener = QueueListener(log_queue, file_handler)
+    _log_listener.start()
+    atexit.register(_stop_log_listener)
+
+def _stop_log_listener():
+    """
+    Writes out any queued log records and stops the listener thread.
+    """
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+def _restart_log_listener_in_child():
+    """
+    Forked router workers inherit the queue handler but not the listener thread, so a child
+    gets its own queue and listener, stopped when the worker process exits.
+    """
+    global _log_listener
+    if _log_listener is None:
+        return
+    log_queue = queue.SimpleQueue()
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, QueueHandler):
+            handler.queue = log_queue
+    _log_listener = QueueListener(log_queue, *_log_listener.handlers)
+    _log_listener.start()
+    multiprocessing.util.Finalize(None, _stop_log_listener, exitpriority=10)
+
+os.register_at_fork(after_in_child=_restart_log_listener_in_child)
+
+@contextmanager
+def log_listener_paused():
+    """
+    Stops the log listener thread for the duration of the block, so the process can fork while no
+    thread is running. Records logged in the meantime stay queued and are written once it resumes.
+    """
+    listener = _log_listener
+    if listener is not None:
+        listener.stop()
+    try:
+        yield
+    finally:
+        if listener is not None:
+            listener.start()
 
 class Router:
     def __init__(self, router_id: str, router_interfaces: dict, direct_connections: dict):
@@ -19,6 +99,9 @@ class Router:
         """
         self.router_id = router_id  
         self.router_interfaces = router_interfaces
+        # Addresses checked on every received datagram, kept as sets for constant-time membership tests
+        self._neighbor_dest_ips = frozenset(dest for _src, dest in router_interfaces.values())
+        self._local_source_ips = frozenset(socket.inet_aton(src) for src, _dest in router_interfaces.values())  # Packed, as in headers
         self.direct_connections = direct_connections
         self.lsa_seq_num = 0
         self.interface_sockets = {}
@@ -39,17 +122,31 @@ class Router:
         receive_socket.setblocking(False)
         self.interface_sockets['rec'] = receive_socket
 
+        # Per-interface state as parallel lists indexed by interface number, for the per-packet paths
+        self._iface_names = list(self.router_interfaces)
+        self._iface_src = [socket.inet_aton(source) for source, _ in self.router_interfaces.values()]
+        self._iface_dst = [dest for _, dest in self.router_interfaces.values()]
+        self._iface_dst_raw = [socket.inet_aton(dest) for dest in self._iface_dst]
+        self._iface_sock = [self.interface_sockets.get(interface) for interface in self._iface_names]
+
+        # Register every socket once with an epoll-backed selector, tagged with its interface
+        self._sel = selectors.DefaultSelector()
+        for interface, int_socket in self.interface_sockets.items():
+            self._sel.register(int_socket, selectors.EVENT_READ, interface)
+
         # Initialize LSA database, timers, and forwarding table
         self.router_lsa_num = {}
         self.lsdb = {}
         self.lsa_timer = time.time()
         self.forwarding_table = {}
+        self._trie = [None, None, None]  # Longest prefix match trie over the forwarding table's prefixes
+        self.converged = threading.Event()  # Set once the forwarding table is built and forwarding begins
+        self._rx_queue = queue.Queue()  # (interface, [(datagram bytes, address), ...]) batches from the receive thread
+        self._rx_stop = threading.Event()
+        self._rx_buffers = RecvBuffers(32, 2048)  # Reused by every receive on the receive thread
 
         # Configure logging
-        logging.basicConfig(level=logging.INFO,
-                            format='%(levelname)s - %(message)s',
-                            handlers=[logging.FileHandler('network_app_router.log', mode='w')]
-                            )
+        _start_log_listener()
 
         self.initialize_lsdb()
 
@@ -65,40 +162,43 @@ class Router:
         """
         self.lsdb[self.router_id] = [(dst, cost, iface) for dst, (cost, iface) in self.direct_connections.items()]
 
-    def update_lsdb(self, adv_rtr: str, lsa: str):
+    def update_lsdb(self, adv_rtr: str, lsa: bytes):
         """
         Updates the Link-State Database (LSDB) with new information from a received LSA.
 
         Args:
             adv_rtr (str): The advertising router's ID.
-            lsa (str): The LSA data as a string, where each line contains the neighbor, cost, and interface information.
+            lsa (bytes): The encoded LSA data, where each line contains the neighbor, cost, and interface information.
 
         Returns:
             None
         """
-        lsa = [tuple(line.split(',')) for line in lsa.split('\r\n')]
-        self.lsdb[adv_rtr] = [(neighbor.strip(), int(cost.strip()), interface.strip()) for neighbor, cost, interface in lsa]
+        self.lsdb[adv_rtr] = [(neighbor.decode(), int(cost), interface.decode()) for neighbor, cost, interface in _LSA_RE.findall(lsa)]
 
     def send_initial_lsa(self):
         """
         Broadcasts the initial Link-State Advertisement (LSA) containing the router's direct connections to all interfaces.
 
+        The LSA is serialized once and copied per interface with only the source address changed.
+        Every copy is handed to the kernel in one sendmmsg call through the unbound receive socket; each
+        datagram's IP header already carries its interface's source address, so the wire bytes are
+        the same as sending through the interface's own socket.
+
         Returns:
             None
 
         Logs:
             Logs the sending of the initial LSA.
         """
-        for interface, (source, dest) in self.router_interfaces.items():
-            int_socket = self.interface_sockets[interface]
-            formatted_lsa_data = [f'{neighbor}, {cost}, {interface}' for neighbor, cost, interface in self.lsdb[self.router_id]]
-            new_datagram = LSADatagram(source_ip=source, dest_ip='224.0.0.5', adv_rtr=self.router_id, lsa_seq_num=self.lsa_seq_num, lsa_data='\r\n'.join(formatted_lsa_data))
-            int_socket.sendto(new_datagram.to_bytes(), (dest, 0))
+        formatted_lsa_data = [f'{neighbor}, {cost}, {interface}' for neighbor, cost, interface in self.lsdb[self.router_id]]
+        new_datagram = LSADatagram(dest_ip='224.0.0.5', adv_rtr=self.router_id, lsa_seq_num=self.lsa_seq_num, lsa_data='\r\n'.join(formatted_lsa_data))
+        sendmmsg(self.interface_sockets['rec'], self.lsa_copies(new_datagram.to_bytes()))
         logging.info(f'{self.router_id} has sent the initial LSA.')
 
     def forward_lsa(self, lsa_datagram: LSADatagram, lsa_int: str):
         """
-        Forwards a received LSA to all interfaces except the one on which it was received.
+        Forwards a received LSA to all interfaces except the one on which it was received, batching the
+        copies into one sendmmsg call as in send_initial_lsa.
 
         Args:
             lsa_datagram (LSADatagram): The received LSA datagram to be forwarded.
@@ -113,17 +213,37 @@ class Router:
         Exceptions:
             Logs any exceptions that occur during forwarding.
         """
-        time.sleep(1) # Make sure all initial LSAs are sent before forwarding an LSA
-        for interface in self.router_interfaces:
-            if interface != lsa_int and lsa_datagram.adv_rtr != self.router_id:
-                source, dest = self.router_interfaces[interface]
-                int_socket = self.interface_sockets[interface]
-                new_datagram = LSADatagram(source_ip=source, dest_ip='224.0.0.5', adv_rtr=lsa_datagram.adv_rtr, lsa_seq_num=lsa_datagram.lsa_seq_num, lsa_data=lsa_datagram.lsa_data)
-                try:
-                    int_socket.sendto(new_datagram.to_bytes(), (dest, 0))
-                    logging.info(f'{self.router_id}: LSA forwarded to {dest}.')
-                except Exception as e:
-                    logging.error(f'Error forwarding LSA: {e}')
+        if lsa_datagram.adv_rtr == self.router_id:
+            return
+
+        new_datagram = LSADatagram(dest_ip='224.0.0.5', adv_rtr=lsa_datagram.adv_rtr, lsa_seq_num=lsa_datagram.lsa_seq_num, lsa_data=lsa_datagram.lsa_data_bytes)
+        datagrams = self.lsa_copies(new_datagram.to_bytes(), lsa_int)
+        try:
+            sendmmsg(self.interface_sockets['rec'], datagrams)
+            for _, (dest, _port) in datagrams:
+                logging.info(f'{self.router_id}: LSA forwarded to {dest}.')
+        except Exception as e:
+            logging.error(f'Error forwarding LSA: {e}')
+
+    def lsa_copies(self, lsa_bytes: bytes, skip_interface: str = None):
+        """
+        Copies a serialized LSA once per interface, patching each copy's source address to the
+        interface's own address. The IP checksum is left for the kernel to fill in.
+
+        Args:
+            lsa_bytes (bytes): The serialized LSA.
+            skip_interface (str): An interface to leave out, such as the one the LSA arrived on (default: None).
+
+        Returns:
+            list: (datagram, (neighbor address, 0)) tuples ready for sendmmsg.
+        """
+        datagrams = []
+        for i in range(len(self._iface_names)):
+            if self._iface_names[i] != skip_interface:
+                buf = bytearray(lsa_bytes)
+                buf[IP_SADDR_OFFSET:IP_SADDR_OFFSET + 4] = self._iface_src[i]
+                datagrams.append((buf, (self._iface_dst[i], 0)))
+        return datagrams
 
     def run_route_alg(self):
         """
@@ -136,38 +256,127 @@ class Router:
         Raises:
             None
         """
+        self.forwarding_table = Router._compute_forwarding_table(self.router_id, self.lsdb)
+        self._trie = Router._build_prefix_trie(self.forwarding_table, self._iface_names)
+
+    @staticmethod
+    def _build_prefix_trie(forwarding_table: dict, iface_names: list):
+        """
+        Builds a binary trie over the prefixes in a forwarding table for longest prefix matching.
+        Each node is a [zero child, one child, interface number] list; a prefix of length n marks
+        the node reached by its first n bits, most significant bit first, with the number of its
+        outgoing interface. Prefixes with no outgoing interface (unreachable) are left out.
+
+        Args:
+            forwarding_table (dict): The forwarding table in the form {node: (interface, cost)}.
+            iface_names (list): The router's interface names, in interface number order.
+
+        Returns:
+            list: The root node of the trie.
+        """
+        root = [None, None, None]
+        for network, (interface, _) in forwarding_table.items():
+            try:
+                if '/' in network and interface in iface_names:
+                    network_addr, prefix_length = network.split('/')
+                    prefix_length = int(prefix_length)
+                    network_int = int.from_bytes(socket.inet_aton(network_addr), 'big')
+                    node = root
+                    for shift in range(31, 31 - prefix_length, -1):
+                        bit = (network_int >> shift) & 1
+                        if node[bit] is None:
+                            node[bit] = [None, None, None]
+                        node = node[bit]
+                    if node[2] is None:  # Keep the first of any duplicate prefixes
+                        node[2] = iface_names.index(interface)
+            except Exception as e:
+                logging.error(f'Error while indexing prefix {network}: {e}')
+        return root
+
+    def _trie_lookup(self, dest_ip_int: int):
+        """
+        Finds the longest prefix in the forwarding table that contains an address, in at most
+        32 steps regardless of how many prefixes the table holds.
+
+        Args:
+            dest_ip_int (int): The destination address as a 32-bit integer.
+
+        Returns:
+            int: The number of the longest matching prefix's outgoing interface, or None if no
+                 prefix contains the address.
+        """
+        node = self._trie
+        fwd = node[2]
+        shift = 31
+        while shift >= 0:
+            node = node[(dest_ip_int >> shift) & 1]
+            if node is None:
+                break
+            if node[2] is not None:
+                fwd = node[2]
+            shift -= 1
+        return fwd
+
+    @staticmethod
+    def _compute_forwarding_table(router_id: str, lsdb: dict):
+        """
+        Computes the forwarding table for a router from its LSDB.
+
+        Args:
+            router_id (str): The router the shortest paths are computed from.
+            lsdb (dict): The LSDB in the form {node: [(neighbor, cost, interface), ...]}.
+
+        Returns:
+            dict: The forwarding table in the form {node: (interface, cost)}.
+        """
         graph = Graph()
-        for node, neighbors in self.lsdb.items():
+        for node, neighbors in lsdb.items():
             for neighbor, cost, interface in neighbors:
                 graph.add_edge(node, neighbor, cost, interface)
 
-        # Initialize Dijkstra's algorithm
-        N_prime = {self.router_id}
-        D = {node: float('inf') for node in graph.nodes}
-        D[self.router_id] = 0
-        previous_nodes = {node: (None, None) for node in graph.nodes}
-        paths = {node: [] for node in graph.nodes}
-
-        # Update initial neighbors
-        for neighbor, cost, interface in graph.nodes[self.router_id]:
-            D[neighbor] = cost
-            previous_nodes[neighbor] = (self.router_id, interface)
-            paths[neighbor] = [(neighbor, interface)]
-
-        # Dijkstra's algorithm
-        while len(N_prime) < len(graph.nodes):
-            w = min((node for node in D if node not in N_prime), key=D.get)
-            N_prime.add(w)
-            for neighbor, cost, interface in graph.nodes[w]:
-                if neighbor not in N_prime:
-                    new_distance = D[w] + cost
-                    if new_distance < D[neighbor]:
-                        D[neighbor] = new_distance
-                        previous_nodes[neighbor] = (w, interface)
-                        paths[neighbor] = paths[w] + [(neighbor, interface)]
-
-        # Update forwarding table
-        self.forwarding_table = {node: (paths[node][0][1] if paths[node] else None, D[node]) for node in graph.nodes}
+        graph.finalize()
+
+        dist, _, first_edge = dijkstra_csr(graph.indptr, graph.to_idx, graph.cost, graph.node_ids[router_id])
+
+        # The first edge of each shortest path gives the forwarding interface
+        forwarding_table = {}
+        for node, node_id in graph.node_ids.items():
+            edge = first_edge[node_id]
+            interface = graph.iface_name(graph.iface_idx[edge]) if edge != -1 else None
+            # Costs are integers in the LSDB; keep them that way in the table
+            distance = int(dist[node_id]) if dist[node_id] != float('inf') else float('inf')
+            forwarding_table[node] = (interface, distance)
+        return forwarding_table
+
+    def wait_readable(self, timeout: float):
+        """
+        Blocks until at least one interface socket has a datagram waiting or the timeout expires,
+        so idle router threads sleep in the kernel instead of spinning on non-blocking reads.
+
+        Args:
+            timeout (float): Maximum number of seconds to wait.
+
+        Returns:
+            list: (interface, socket) pairs that are ready to be read.
+        """
+        return [(key.data, key.fileobj) for key, _ in self._sel.select(max(timeout, 0))]
+
+    def receive_datagrams(self):
+        """
+        Receive loop run on its own thread by process_datagrams. Waits for any socket to become
+        readable, drains it with recvmmsg and queues the batch for processing, until stopped.
+
+        Returns:
+            None
+        """
+        while not self._rx_stop.is_set():
+            for interface, int_socket in self.wait_readable(0.1):
+                try:
+                    batch = recvmmsg(int_socket, buffers=self._rx_buffers)
+                except Exception:
+                    continue
+                if batch:
+                    self._rx_queue.put((interface, batch))
 
     def process_datagrams(self):
         """
@@ -180,25 +389,43 @@ class Router:
         Logs:
             Logs the content of the LSDB and forwarding table.
         """
+        # Sockets are drained on a separate thread, so LSA flooding and route computation on this
+        # thread never leave datagrams sitting in (and overflowing) the kernel's socket buffers
+        self._rx_stop.clear()
+        receiver = threading.Thread(target=self.receive_datagrams, daemon=True)
+        receiver.start()
+
         while time.time() - self.lsa_timer < 5:
-            for interface in self.interface_sockets.keys():
+            try:
+                interface, batch = self._rx_queue.get(timeout=max(5 - (time.time() - self.lsa_timer), 0))
+            except queue.Empty:
+                continue
+            for new_datagram_bytes, address in batch:
                 try:
-                    new_datagram_bytes, address = self.interface_sockets[interface].recvfrom(1024)
                     new_datagram = IPHeader.from_bytes(new_datagram_bytes)
-                    if new_datagram.ip_daddr == '224.0.0.5' and address[0] in [connection[1] for connection in self.router_interfaces.values()]:
+                    if new_datagram.ip_daddr_int == _LSA_MCAST_INT and address[0] in self._neighbor_dest_ips:
                         self.process_link_state_advertisement(new_datagram_bytes, interface)
                 except Exception:
-                    continue               
+                    continue
         self.run_route_alg()
         time.sleep(1)
+        self.converged.set()
         start_time = time.time()
         while time.time() - start_time < 10:
-            for interface in self.interface_sockets.keys():
+            try:
+                _, batch = self._rx_queue.get(timeout=max(10 - (time.time() - start_time), 0))
+            except queue.Empty:
+                continue
+            outbox = {}
+            for new_datagram_bytes, _ in batch:
                 try:
-                    new_datagram_bytes, _ = self.interface_sockets[interface].recvfrom(1024)
-                    self.forward_datagram(new_datagram_bytes)
+                    self.forward_datagram(new_datagram_bytes, outbox)
                 except Exception:
                     continue
+            self.flush_forwarded(outbox)
+
+        self._rx_stop.set()
+        receiver.join()
 
         logging.info(f'{self.router_id} LSDB: {self.lsdb}')
         logging.info(f'{self.router_id} Forwarding Table: {self.forwarding_table}')
@@ -227,15 +454,17 @@ class Router:
         if (adv_rtr not in self.router_lsa_num or self.router_lsa_num[adv_rtr] < lsa_seq_num) and adv_rtr != self.router_id:
             self.lsa_timer = time.time()  # Reset the LSA timer
             self.router_lsa_num[adv_rtr] = lsa_seq_num  # Update sequence number
-            self.update_lsdb(adv_rtr, datagram.lsa_data)  # Update LSDB
+            self.update_lsdb(adv_rtr, datagram.lsa_data_bytes)  # Update LSDB
             self.forward_lsa(datagram, interface)  # Forward the LSA to other interfaces
 
-    def forward_datagram(self, dgram: bytes):
+    def forward_datagram(self, dgram: bytes, outbox: dict = None):
         """
         Forwards an HTTP datagram to the appropriate next hop based on the forwarding table.
 
         Args:
             dgram (bytes): The datagram received as raw bytes.
+            outbox (dict): If given, the forwarded datagram is queued here by outgoing interface number
+                           instead of being sent, for a later flush_forwarded call (default: None).
 
         Returns:
             None
@@ -246,65 +475,55 @@ class Router:
         Raises:
             Exception: Logs any errors during the forwarding process.
         """
-        datagram = HTTPDatagram.from_bytes(dgram)
+        # Only the headers are parsed; the payload is passed through untouched
+        header = HTTPDatagram.header_only_from_bytes(dgram)
 
-        if datagram.next_hop in [connection[0] for connection in self.router_interfaces.values()]: # make sure the datagram was intended for this router
+        if header.next_hop in self._local_source_ips: # make sure the datagram was intended for this router
 
-            # Convert destination IP address to binary for longest prefix matching
-            dest_ip_binary = ''.join(f'{int(octet):08b}' for octet in datagram.ip_daddr.split('.'))
-            longest_prefix = None
-            max_length = -1
+            # Longest prefix match against known networks gives the forwarding interface's number
+            fwd = self._trie_lookup(int.from_bytes(header.ip_daddr, 'big'))
 
-            # Perform longest prefix match against known networks
-            for network in self.forwarding_table.keys():
-                try:
-                    if '/' in network:
-                        network_addr, prefix_length = network.split('/')
-                        prefix_length = int(prefix_length)
-                        network_addr_binary = ''.join(f'{int(octet):08b}' for octet in network_addr.split('.'))
-
-                        matching_bits = 0
-
-                        for index in range(prefix_length):
-                            if dest_ip_binary[index] == network_addr_binary[index]:
-                                matching_bits += 1
-                            else:
-                                break
-                        
-                        if matching_bits > max_length:
-                            max_length = matching_bits
-                            longest_prefix = network
+            # Forward the datagram to the correct interface
+            if fwd is not None:
+                next_hop = self._iface_dst[fwd]
 
-                except Exception as e:
-                    logging.error(f'Error while performing longest prefix match: {e}')
+                # Prepare datagram for forwarding: a copy with only the next hop rewritten. The IP
+                # checksum does not cover the next hop and is filled in by the kernel anyway.
+                fwd_dgram_bytes = bytearray(dgram)
+                fwd_dgram_bytes[HTTPDatagram.NEXT_HOP_OFFSET:HTTPDatagram.NEXT_HOP_OFFSET + 4] = self._iface_dst_raw[fwd]
 
-            # Forward the datagram to the correct interface
-            if longest_prefix:
-                fwd_int = self.forwarding_table[longest_prefix][0]  # Find forwarding interface
-
-                # Prepare datagram for forwarding
-                fwd_socket = self.interface_sockets[fwd_int]
-                fwd_dgram = HTTPDatagram(
-                    source_ip=datagram.ip_saddr,
-                    dest_ip=datagram.ip_daddr,
-                    source_port=datagram.source_port,
-                    dest_port=datagram.dest_port,
-                    seq_num=datagram.seq_num,
-                    ack_num=datagram.ack_num,
-                    flags=datagram.flags,
-                    window_size=datagram.window_size,
-                    next_hop=self.router_interfaces[fwd_int][1],
-                    data=datagram.data
-                )
-                fwd_dgram_bytes = fwd_dgram.to_bytes()
+                if outbox is not None:
+                    outbox.setdefault(fwd, []).append((fwd_dgram_bytes, (next_hop, 0)))
+                    return
 
                 try:
                     # Forward the datagram to the next hop
-                    fwd_socket.sendto(fwd_dgram_bytes, (self.router_interfaces[fwd_int][1], 0))
-                    logging.info(f'{self.router_id}: Forwarding packet to {self.router_interfaces[fwd_int][1]}.')
+                    self._iface_sock[fwd].sendto(fwd_dgram_bytes, (next_hop, 0))
+                    logging.info(f'{self.router_id}: Forwarding packet to {next_hop}.')
                 except Exception as e:
                     logging.error(f'Error forwarding the datagram: {e}')
 
+    def flush_forwarded(self, outbox: dict):
+        """
+        Sends the datagrams queued by forward_datagram, one sendmmsg system call per outgoing interface.
+
+        Args:
+            outbox (dict): Lists of (datagram bytes, (next hop, 0)) tuples keyed by outgoing interface number.
+
+        Returns:
+            None
+
+        Logs:
+            Logs each forwarded datagram, or the error if an interface's batch could not be sent.
+        """
+        for fwd, datagrams in outbox.items():
+            try:
+                sendmmsg(self._iface_sock[fwd], datagrams)
+                for _, (next_hop, _port) in datagrams:
+                    logging.info(f'{self.router_id}: Forwarding packet to {next_hop}.')
+            except Exception as e:
+                logging.error(f'Error forwarding the datagram: {e}')
+
     def shutdown(self):
         """
         Shuts down the router by closing all open sockets.
@@ -315,7 +534,8 @@ class Router:
         Logs:
             Logs the shutdown process of the router.
         """
-        # Close all interface sockets
+        # Close the selector and all interface sockets
+        self._sel.close()
         for interface in self.interface_sockets.keys():
             try:
                 self.interface_sockets[interface].close()
@@ -1,5 +1,6 @@
 import socket
 import random
+import selectors
 import time
 import threading
 from datetime import datetime
@@ -7,6 +8,10 @@ from pdu import HTTPDatagram, IPHeader
 from cryptography.fernet import Fernet
 from cryptographyCY350 import get_key_value
 
+# Response segment flags: data segments (ACK+PSH, optionally with FIN) and those that end the response
+_DATA_FLAGS = frozenset((17, 24, 25))
+_TERM_FLAGS = frozenset((25, 17))
+
 class Client:
     """
     Represents an HTTP client that communicates with a server using a custom protocol via raw sockets.
@@ -49,6 +54,10 @@ class Client:
         self.client_socket.settimeout(timeout)
 
         self.frame_size = frame_size
+        self._rx_buf = bytearray(frame_size)  # Reused by every response frame received
+        self._rx_view = memoryview(self._rx_buf)
+        self._sel = selectors.DefaultSelector()  # Wakes the sender as soon as an ACK arrives
+        self._sel.register(self.client_socket, selectors.EVENT_READ)
         self.window_size = window_size
         self.timeout = timeout
 
@@ -135,59 +144,66 @@ class Client:
 
     def send_request_segments(self, request):
         """
-        Segments and sends the HTTP request using Go-Back-N protocol.
+        Segments and sends the HTTP request using Go-Back-N protocol with cumulative ACKs.
 
         Args:
             request (str): The full HTTP request string.
         """
         print(f"\n****tcp_client send_request_segments right before encoding error for POST request - request: {request}\n")
-        request_bytes = request.encode()
+        request_view = memoryview(request.encode())
         max_data_length = self.frame_size - 60  # Assuming 60 bytes for headers
-        segments = [request_bytes[i:i + max_data_length] for i in range(0, len(request_bytes), max_data_length)]
+        offsets = range(0, len(request_view), max_data_length)  # Segments are slices of the view; nothing is copied
+        n = len(offsets)
 
-        flags = 24  # Set ACK and PSH bits for request
         init_seq_num = self.seq_num
-
-        # Sending segments using Go-Back-N protocol
-        while self.base < len(segments):
-            for segment in segments[self.base:min(len(segments), self.base + self.window_size)]:
-                if self.seq_num - init_seq_num == len(segments) - 1:
-                    flags = 25  # Set the FIN flag on the last segment
+        next_index = self.base  # Index of the next segment to (re)send
+        send_time = {}  # Last send time of each outstanding segment, by index
+
+        # Sending segments using Go-Back-N protocol. ACKs are cumulative: every ACK waiting on the
+        # socket is drained as soon as it is readable and base jumps to the highest one, so only a
+        # timeout on the oldest outstanding segment (base) triggers a retransmission.
+        while self.base < n:
+            window_end = min(n, self.base + self.window_size)
+            for index in range(next_index, window_end):
+                segment = request_view[offsets[index]:offsets[index] + max_data_length]
+                flags = 25 if index == n - 1 else 24  # ACK and PSH, plus FIN on the last segment
+                self.seq_num = init_seq_num + index
 
                 print(f"send_request_segments - Sending: seq_num={self.seq_num}, ack_num={self.ack_num}, flags={flags}")
                 new_datagram = HTTPDatagram(
                     source_ip=self.client_ip, dest_ip=self.server_ip,
                     source_port=self.client_port, dest_port=self.server_port,
                     seq_num=self.seq_num, ack_num=self.ack_num,
-                    flags=flags, window_size=self.window_size, next_hop=self.gateway, data=segment.decode()
+                    flags=flags, window_size=self.window_size, next_hop=self.gateway, data=segment
                 )
-                print(f"Sending segment: seq_num={self.seq_num}, ack_num={self.ack_num}, flags={flags}")
                 self.client_socket.sendto(new_datagram.to_bytes(), (self.gateway, 0))
-                self.seq_num += 1
+                send_time[index] = time.time()
+            next_index = max(next_index, window_end)
+            self.seq_num = init_seq_num + next_index
+
+            # Wait for ACKs until the oldest outstanding segment's retransmission timer expires
+            if not self._sel.select(timeout=max(send_time[self.base] + self.timeout - time.time(), 0)):
+                next_index = self.base  # Retransmit everything from base on timeout
+                continue
 
-            # Processing acknowledgments
-            while self.base < len(segments):
+            # Processing acknowledgments; stop at the final ACK so response frames are left for process_response_segments
+            while self.base < n and self._sel.select(timeout=0):
                 try:
-                    frame = self.client_socket.recv(self.frame_size)
+                    nbytes = self.client_socket.recv_into(self._rx_buf)
                 except socket.timeout:
-                    self.seq_num = self.base + init_seq_num  # Retransmit on timeout
                     break
+                try:
+                    datagram_fields = HTTPDatagram.from_bytes(self._rx_view[:nbytes])
+                except Exception:
+                    continue
 
-                datagram_fields = HTTPDatagram.from_bytes(frame)
-                # Confirm frame is meant for this application and is an ACK for the oldest sent packet
-                if (datagram_fields.next_hop == self.client_ip) and (datagram_fields.ip_saddr == self.server_ip) and (datagram_fields.flags == 16) and (datagram_fields.ack_num == self.base + init_seq_num + 1):
+                # Confirm frame is meant for this application and acknowledges outstanding segments
+                acked = datagram_fields.ack_num - init_seq_num
+                if (datagram_fields.next_hop == self.client_ip) and (datagram_fields.ip_saddr == self.server_ip) and (datagram_fields.flags == 16) and (self.base < acked <= next_index):
                     print(f"CLIENT: send_request_segments: Received ACK: seq_num={datagram_fields.seq_num}, ack_num={datagram_fields.ack_num}")
-                    # send another segment (base + window_size) if necessary
-                    if self.base + self.window_size < len(segments):
-                        segment = segments[self.base + self.window_size]
-                        if self.base == min(len(segments), self.base + self.window_size) - 1:
-                            flags = 25
-                        new_datagram = HTTPDatagram(source_ip=self.client_ip, dest_ip=self.server_ip, source_port=self.client_port, dest_port=self.server_port, seq_num=self.seq_num, ack_num=self.ack_num, flags=flags, window_size=self.window_size, next_hop=self.gateway, data=segment.decode())
-                        datagram_bytes = new_datagram.to_bytes()
-                        self.client_socket.sendto(datagram_bytes, (self.gateway, 0))
-                        self.seq_num += 1
-                    # increment base
-                    self.base += 1  
+                    for index in range(self.base, acked):
+                        send_time.pop(index, None)
+                    self.base = acked
 
     def process_response_segments(self):
         """
@@ -202,17 +218,18 @@ class Client:
 
         cum_ack_time_window = .25
 
-        while time.time() - start_time < 120 and flags not in [25, 17]:  # Stop if FIN or RST flags
+        while time.time() - start_time < 120 and flags not in _TERM_FLAGS:  # Stop if FIN or RST flags
             new_start_time = time.time()
             while time.time()-new_start_time < cum_ack_time_window and flags != 25:
                 try:
                     print("now in try statement for process_response_segments")
-                    frame = self.client_socket.recv(self.frame_size)
+                    nbytes = self.client_socket.recv_into(self._rx_buf)
+                    frame = self._rx_view[:nbytes]
                     frame_bytes = IPHeader.from_bytes(frame)
                     if frame_bytes.ip_daddr == self.client_ip:
                         datagram_fields = HTTPDatagram.from_bytes(frame)
                         #print(f"datagram_fields in process_response_segments: {datagram_fields}")
-                        if datagram_fields.next_hop == self.client_ip and datagram_fields.flags in [17, 24, 25]:
+                        if datagram_fields.next_hop == self.client_ip and datagram_fields.flags in _DATA_FLAGS:
                             print("now in if statement for datagram_fields.next_hop == self.client_ip and datagram_fields.flags in [17, 24, 25]")
                             if datagram_fields.seq_num == self.ack_num:
                                 print("now in if statement for datagram_fields.seq_num == self.ack_num")
@@ -246,6 +263,7 @@ class Client:
         """
         Closes the client's socket.
         """
+        self._sel.close()
         self.client_socket.close()
 
     def request_resource(self, resource, timestamp=None, type="GET", data=None):
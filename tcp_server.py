@@ -1,12 +1,97 @@
+import os
 import socket
 import json
-from pdu import HTTPDatagram, IPHeader
+import logging
+import time
+import queue
+import struct
+import calendar
+import selectors
+import threading
+from pdu import HTTPDatagram, IP_SADDR_OFFSET, IP_DADDR_OFFSET
+from net_batch import RecvBuffers, recvmmsg, sendmmsg
 from pathlib import Path
 from datetime import datetime
-from random import choices
+from secrets import token_hex
 from cryptography.fernet import Fernet
 from cryptographyCY350 import get_key_value
 
+log = logging.getLogger(__name__)
+
+# orjson is optional: it reads and writes resources.json several times faster than the standard
+# library's encoder. Both indent by two spaces and write UTF-8.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _load_json(path):
+    """
+    Reads a JSON file.
+
+    Args:
+        path (Path): The file to read.
+
+    Returns:
+        The decoded JSON document.
+    """
+    if orjson is not None:
+        return orjson.loads(Path(path).read_bytes())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _dump_json(data, path):
+    """
+    Writes a JSON document to a file, indented by two spaces.
+
+    Args:
+        data: The document to write.
+        path (str): The file to write.
+    """
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)  # orjson writes non-ASCII text unescaped too
+
+# Format of the Last-Modified and If-Modified-Since dates
+_HTTP_DATE_FORMAT = "%a, %d %b %Y %H:%M:%S GMT"
+
+def _http_date_to_timestamp(value):
+    """
+    Converts an HTTP date to a Unix timestamp, so that dates compare as plain integers.
+
+    Args:
+        value (str): A date in _HTTP_DATE_FORMAT.
+
+    Returns:
+        int: Seconds since the epoch.
+
+    Raises:
+        ValueError: If the date does not match _HTTP_DATE_FORMAT.
+    """
+    return calendar.timegm(time.strptime(value, _HTTP_DATE_FORMAT))
+
+# Fixed responses, and the header of a 200 response to a GET (formatted with the body length and ETag)
+_RESP_400 = b"HTTP/1.1 400 Bad Request\r\n\r\nInvalid Request"
+_RESP_404 = b"HTTP/1.1 404 Not Found\r\n\r\nResource Not Found"
+_RESP_304 = b"HTTP/1.1 304 Not Modified\r\n\r\n"
+_RESP_POST_OK = b"HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\nPOST request successfully received.\r\n\r\n"
+_RESP_200_HEADER = b'HTTP/1.1 200 OK\r\nContent-Length: %d\r\nETag: "%s"\r\n\r\n'
+
+# Request segment flags: data segments (ACK+PSH, optionally with FIN)
+_DATA_FLAGS = frozenset((24, 25))
+
+# Packed multicast address that LSAs are flooded to; the server ignores them
+_LSA_MCAST_RAW = socket.inet_aton('224.0.0.5')
+
+# Queued by close_server to wake a server thread still waiting for frames
+_CLOSED = object()
+
+# Sequence and acknowledgment numbers, patched into a header template as one unit
+_SEQ_ACK = struct.Struct('!LL')
+
 class Server:
     """
     Represents a custom HTTP-like server using raw sockets. It handles connection requests,
@@ -23,6 +108,8 @@ class Server:
         base (int): Base sequence number for Go-Back-N protocol.
         seq_num (int): Current sequence number.
         ack_num (int): Current acknowledgment number.
+        ready (threading.Event): Set once run_server is waiting for a connection.
+        finished (threading.Event): Set once run_server has finished handling a request.
     """
 
     def __init__(self, server_ip='127.128.0.1', gateway='127.128.0.254', server_port=8080, frame_size=2048, window_size=4, timeout=1):
@@ -43,6 +130,12 @@ class Server:
 
         self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_RAW)
         self.server_socket.bind((self.server_ip, 0))
+        self.server_socket.setblocking(False)  # Reads are gated on the selector and drained in batches
+        self._server_ip_raw = socket.inet_aton(self.server_ip)  # For matching addresses in received frames
+
+        # Readiness is polled through a selector registered once, rather than per-call socket timeouts
+        self._sel = selectors.DefaultSelector()
+        self._sel.register(self.server_socket, selectors.EVENT_READ)
 
         self.frame_size = frame_size
         self.window_size = window_size
@@ -54,11 +147,146 @@ class Server:
         # Load server resources from a JSON file
         self.base_path = Path(__file__).parent
         self.resources_path = self.base_path / 'resources.json'
-        with open(self.resources_path, 'r') as f:
-            self.resources = json.load(f)
+        self.resources = _load_json(self.resources_path)
+
+        # Parsed modification times and ready-made 200 responses, kept beside the resources (rather
+        # than in them) so that nothing derived ends up written back to resources.json
+        self._last_modified_ts = {}
+        self._ok_responses = {}
+        for resource, resource_info in self.resources.items():
+            self._index_resource(resource, resource_info)
         
         self.f = get_key_value()
 
+        # New resources are written back to disk by a writer thread, off the request's critical path
+        self._write_queue = queue.Queue()  # (file path, key, entry) tuples, or None to stop the writer
+        self._writer_thread = threading.Thread(target=self.write_json_entries, daemon=True)
+        self._writer_thread.start()
+
+        # Frames are drained from the socket by a receive thread while run_server is running
+        self._rx_buffers = RecvBuffers(32, self.frame_size)
+        self._rx_queue = queue.Queue()  # Received frames, in arrival order
+        self._rx_stop = threading.Event()
+        self._rx_thread = None
+
+        # Header template for the current client, built once per connection and patched per segment
+        self._tx_buf = bytearray()
+        self._tx_peer = None
+
+        self.ready = threading.Event()
+        self.finished = threading.Event()
+
+    def _index_resource(self, resource, resource_info):
+        """
+        Caches a resource's modification time and its full 200 response.
+
+        Args:
+            resource (str): The resource path.
+            resource_info (dict): The resource's entry, with 'last_modified', 'etag' and 'data' keys.
+        """
+        self._last_modified_ts[resource] = _http_date_to_timestamp(resource_info['last_modified'])
+        body = resource_info['data'].encode()
+        self._ok_responses[resource] = _RESP_200_HEADER % (len(body), resource_info['etag'].encode()) + body
+
+    def _build_template(self, dest_ip, dest_port):
+        """
+        Lays out the static header fields (addresses, ports, window size and next hop) for datagrams
+        sent to a client, so that each segment only patches in its sequence numbers, flags and data.
+
+        Args:
+            dest_ip (str): The client's IP address.
+            dest_port (int): The client's port.
+
+        Returns:
+            bytearray: A frame_size buffer holding the serialized headers.
+        """
+        header = HTTPDatagram(
+            source_ip=self.server_ip, dest_ip=dest_ip,
+            source_port=self.server_port, dest_port=dest_port,
+            window_size=self.window_size, next_hop=self.gateway, data=b''
+        ).to_bytes()
+        buf = bytearray(self.frame_size)
+        buf[:len(header)] = header
+        self._tx_buf = buf
+        self._tx_peer = (dest_ip, dest_port)
+        return buf
+
+    def _patch_segment(self, seq_num, ack_num, flags, data):
+        """
+        Patches a segment's mutable fields into the header template.
+
+        Args:
+            seq_num (int): Sequence number of the segment.
+            ack_num (int): Acknowledgment number of the segment.
+            flags (int): Flags for the segment.
+            data (bytes): Payload of the segment.
+
+        Returns:
+            memoryview: The serialized segment, valid until the template is patched again.
+        """
+        buf = self._tx_buf
+        _SEQ_ACK.pack_into(buf, HTTPDatagram.SEQ_NUM_OFFSET, seq_num, ack_num)
+        buf[HTTPDatagram.FLAGS_OFFSET] = flags
+        end = HTTPDatagram.PAYLOAD_OFFSET + len(data)
+        buf[HTTPDatagram.PAYLOAD_OFFSET:end] = data  # Grows the buffer if an encrypted segment outgrows the frame
+        return memoryview(buf)[:end]
+
+    def _send_segment(self, seq_num, ack_num, flags, data):
+        """
+        Patches a segment's mutable fields into the header template and sends it to the gateway.
+
+        Args:
+            seq_num (int): Sequence number of the segment.
+            ack_num (int): Acknowledgment number of the segment.
+            flags (int): Flags for the segment.
+            data (bytes): Payload of the segment.
+        """
+        self.server_socket.sendto(self._patch_segment(seq_num, ack_num, flags, data), (self.gateway, 0))
+
+    def receive_frames(self):
+        """
+        Receive loop run on its own thread by run_server. Waits for the socket to become readable,
+        drains it with recvmmsg and queues the frames for the protocol code, until stopped. A closed
+        selector is also taken as a request to stop.
+
+        Returns:
+            None
+        """
+        while not self._rx_stop.is_set():
+            try:
+                if not self._sel.select(0.1):
+                    continue
+            except (ValueError, OSError):
+                return
+            try:
+                batch = recvmmsg(self.server_socket, buffers=self._rx_buffers)
+            except Exception:
+                continue
+            for data, _ in batch:
+                self._rx_queue.put(data)
+
+    def _recv_frame(self, timeout):
+        """
+        Returns the next frame queued by the receive thread.
+
+        Args:
+            timeout (float): Seconds to wait for a frame, or None to wait indefinitely.
+
+        Returns:
+            bytes: The received frame, or None if the timeout expired first.
+
+        Raises:
+            OSError: If the server has been closed.
+        """
+        try:
+            frame = self._rx_queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if frame is _CLOSED:
+            self._rx_queue.put(_CLOSED)  # Leave it for any later call
+            raise OSError('server closed')
+        return frame
+
     def accept_handshake(self):
         """
         Handles the three-way handshake for establishing a connection with a client.
@@ -66,40 +294,36 @@ class Server:
         Returns:
             bool: True if the handshake is successful, False otherwise.
         """
+        # Frames are matched on their headers alone, compared as packed addresses, so payloads are
+        # never decoded and no datagram objects are built
         syn = False
         while not syn:
-            frame = self.server_socket.recv(self.frame_size)
-            if IPHeader.from_bytes(frame).ip_daddr != '224.0.0.5':
-                datagram_fields = HTTPDatagram.from_bytes(frame)
+            frame = self._recv_frame(None)
+            if frame[IP_DADDR_OFFSET:IP_DADDR_OFFSET + 4] != _LSA_MCAST_RAW:
+                header = HTTPDatagram.header_only_from_bytes(frame)
 
-                if datagram_fields.flags == 2 and datagram_fields.next_hop == self.server_ip:
+                if header.flags == 2 and header.next_hop == self._server_ip_raw:
                     syn = True
-                    self.window_size = min(self.window_size, datagram_fields.window_size)
-                    self.ack_num = datagram_fields.seq_num + 1
+                    self.window_size = min(self.window_size, header.window_size)
+                    self.ack_num = header.seq_num + 1
 
         # Step 2: Send SYN/ACK
-        self.server_socket.settimeout(self.timeout)
-        syn_ack_datagram = HTTPDatagram(
-            source_ip=self.server_ip, dest_ip=datagram_fields.ip_saddr,
-            source_port=self.server_port, dest_port=datagram_fields.source_port,
-            seq_num=self.seq_num, ack_num=self.ack_num, flags=18, window_size=self.window_size,
-            next_hop=self.gateway, data='SYN-ACK'
-        )
-        self.server_socket.sendto(syn_ack_datagram.to_bytes(), (self.gateway, 0))
+        self._build_template(socket.inet_ntoa(header.ip_saddr), header.source_port)
+        self._send_segment(self.seq_num, self.ack_num, 18, b'SYN-ACK')
         self.seq_num += 1
 
         # Step 3: Receive ACK
         ack = False
         while not ack:
-            try:
-                frame = self.server_socket.recv(self.frame_size)
-            except socket.timeout:
+            frame = self._recv_frame(self.timeout)
+            if frame is None:
                 self.reset_connection()
                 return False
-            
-            if IPHeader.from_bytes(frame).ip_daddr != '224.0.0.5':
-                datagram_fields = HTTPDatagram.from_bytes(frame)
-                if datagram_fields.flags == 16 and datagram_fields.ack_num == self.seq_num and datagram_fields.next_hop == self.server_ip:
+
+
+            if frame[IP_DADDR_OFFSET:IP_DADDR_OFFSET + 4] != _LSA_MCAST_RAW:
+                header = HTTPDatagram.header_only_from_bytes(frame)
+                if header.flags == 16 and header.ack_num == self.seq_num and header.next_hop == self._server_ip_raw:
                     ack = True
                     return True
         return False
@@ -111,66 +335,106 @@ class Server:
         Returns:
             tuple: The reassembled request string, the source port, and the source IP address.
         """
-        self.server_socket.settimeout(None)
-        request = ''
-
-        while request[-4:] != '\r\n\r\n':  # End of HTTP request
-            frame = self.server_socket.recv(self.frame_size)
-            frame_bytes = IPHeader.from_bytes(frame)
-            if frame_bytes.ip_daddr == self.server_ip:
-                datagram_fields = HTTPDatagram.from_bytes(frame)
-                print(f"receive_request_segments in tcp_server - datagram_fields: {datagram_fields}")
-                if datagram_fields.next_hop == self.server_ip and datagram_fields.flags in [24, 25]:
-                    # print datagra_fields.seq_num and self.ack_num
-                    print(f"receive_request_segments in tcp_server - datagram_fields.seq_num: {datagram_fields.seq_num}")
-                    print(f"receive_request_segments in tcp_server - self.ack_num: {self.ack_num}")
-                    if datagram_fields.seq_num == self.ack_num:
+        # Payloads are collected and joined once at the end. Only the latest payload is checked for
+        # the blank line that ends the request, joined with earlier bytes if it is too short to hold it
+        parts = []
+        tail = b''
+        debug = log.isEnabledFor(logging.DEBUG)  # Skips building diagnostics per frame unless wanted
+
+        while not tail.endswith(b'\r\n\r\n'):  # End of HTTP request
+            frame = self._recv_frame(None)
+            if frame[IP_DADDR_OFFSET:IP_DADDR_OFFSET + 4] == self._server_ip_raw:
+                header = HTTPDatagram.header_only_from_bytes(frame)
+                if debug:
+                    log.debug("receive_request_segments - header: %s", header)
+                if header.next_hop == self._server_ip_raw and header.flags in _DATA_FLAGS:
+                    if debug:
+                        log.debug("receive_request_segments - seq_num: %d, expected: %d", header.seq_num, self.ack_num)
+                    if header.seq_num == self.ack_num:
                         self.ack_num += 1
-                        request += datagram_fields.data
-                        print(f"receive_request_segments in tcp_server - request: {request}")
-                    else:
-                        print(f"!!! ACK mismatch: seq_num={datagram_fields.seq_num}, expected ack_num={self.ack_num}")
+                        chunk = frame[header.payload_offset:]
+                        parts.append(chunk)
+                        tail = chunk if len(chunk) >= 4 else (tail + chunk)[-4:]
+                        if debug:
+                            log.debug("receive_request_segments - request segment: %r", chunk)
+                    elif debug:
+                        log.debug("receive_request_segments - ACK mismatch: seq_num=%d, expected ack_num=%d",
+                                  header.seq_num, self.ack_num)
                     # Send acknowledgment
-                    ack = HTTPDatagram(
-                        source_ip=self.server_ip, dest_ip=datagram_fields.ip_saddr,
-                        source_port=self.server_port, dest_port=datagram_fields.source_port,
-                        seq_num=self.seq_num, ack_num=self.ack_num, flags=16,
-                        window_size=self.window_size, next_hop=self.gateway, data='ACK'
-                    )
-                    print(f"receive_request_segments in tcp_server - ack: {ack}, datagram_fields.seq_num: {datagram_fields.seq_num}, self.ack_num: {self.ack_num}")
-                    self.server_socket.sendto(ack.to_bytes(), (self.gateway, 0))
-        print("full request received")
-
-        return request, datagram_fields.source_port, datagram_fields.ip_saddr
+                    self._send_segment(self.seq_num, self.ack_num, 16, b'ACK')
+        log.debug("full request received")
+
+        request = b''.join(parts).decode()
+        return request, header.source_port, socket.inet_ntoa(header.ip_saddr)
     
     def newRandomETag(self):
-        # found random.choices from https://www.w3schools.com/python/ref_random_choices.asp
-        # found .join from https://www.freecodecamp.org/news/python-join-how-to-combine-a-list-into-a-string-in-python/
-        alphabet = "abcdefghijklmnopqrstuvwxyz"
-        digits = "0123456789"
-        result = ''.join(choices(alphabet, k=3)) + ''.join(choices(digits, k=3)) 
-        print(f"newRandomETag - new ETag: {result}")
+        """
+        Generates a new ETag for a resource: six random hex digits from a single call into the OS
+        random source.
+
+        Returns:
+            str: The ETag.
+        """
+        result = token_hex(3)
+        log.debug("newRandomETag - new ETag: %s", result)
         return result
     def add_json_entry(self, file_path, key, entry): # added this function to add a new entry to the resources.json file; from: https://chatgpt.com/share/675a4f94-a71c-8003-ba56-a39625a5bc09
         """
-        Adds a new entry to a JSON file.
+        Adds a new entry to the server's resources and queues the JSON file to be rewritten from them.
+        The in-memory resources are authoritative, so the file is never read back. The write happens
+        on the writer thread; this only queues it.
         
         :param file_path: Path to the JSON file.
         :param key: The key for the new entry.
         :param entry: A dictionary containing the new entry data.
         """
-        # Load the JSON file
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-        
-        # Add the new entry
-        data[key] = entry
-        
-        # Write the updated data back to the JSON file
-        with open(file_path, 'w') as f:
-            json.dump(data, f, indent=4)
-        
-        print(f"Entry added for key: {key}")
+        self.resources[key] = entry
+        self._write_queue.put((file_path, key, entry))
+
+    def write_json_entries(self):
+        """
+        Writer loop run on its own thread from __init__. Entries queued together are covered by a
+        single write per file of a snapshot of the resources. Each file is written to a temporary
+        file that then replaces it, so readers never see a partial write. Runs until close_server
+        queues None.
+
+        Returns:
+            None
+        """
+        while True:
+            batch = [self._write_queue.get()]
+            while True:
+                try:
+                    batch.append(self._write_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            keys_by_path = {}
+            for item in batch:
+                if item is not None:
+                    file_path, key, _ = item
+                    keys_by_path.setdefault(file_path, []).append(key)
+
+            for file_path, keys in keys_by_path.items():
+                try:
+                    # Copy the resources first (a single C-level operation), since the server thread
+                    # may add to them while they are being written
+                    data = dict(self.resources)
+
+                    # Write the resources to the JSON file
+                    tmp_path = f"{file_path}.tmp"
+                    _dump_json(data, tmp_path)
+                    os.replace(tmp_path, file_path)
+
+                    for key in keys:
+                        print(f"Entry added for key: {key}")
+                except Exception as e:
+                    print(f'Error while writing {file_path}: {e}')
+
+            for _ in batch:
+                self._write_queue.task_done()
+            if None in batch:
+                return
 
     def process_request(self, request, dest_port, dest_ip):
         """
@@ -203,28 +467,29 @@ class Server:
         Host: <server>
         If-Modified-Since: <timestamp> (optional)
         """
-        request_lines = request.split('\r\n')
-        print(f"request_lines: {request_lines}")
-
-        first_line = request_lines[0].split()
-        print(f"first_line: {first_line}")
-
+        debug = log.isEnabledFor(logging.DEBUG)  # Skips building diagnostics per segment unless wanted
+
+        # Only the head is split into lines; a body after the blank line is taken whole. (The client
+        # sends POST data as the line after the headers, so that ends up in the head.)
+        head, _, request_body = request.partition('\r\n\r\n')
+        head_lines = head.split('\r\n')
+        first_line = head_lines[0].split(None, 2)
+        # Header names are case-insensitive, so they are looked up lowercased
+        headers = {name.strip().lower(): value.strip()
+                   for name, sep, value in (line.partition(':') for line in head_lines[1:]) if sep}
         method = first_line[0]
-        print(f"method: {method}")
-
         resource = first_line[1]
-        print(f"resource: {resource}")
+        if debug:
+            log.debug("process_request - method: %s, resource: %s, head_lines: %s", method, resource, head_lines)
 
         
 
         # ensure that if a POST request is made to a resource that exists in the resources.json file, a different resource name is given so that a POST request can still go through.
         if resource in self.resources and method == "POST":
-            print(f"resource exists in resources.json file")
+            log.debug("resource exists in resources.json file")
             resource = '/new_resource.html'
         
 
-        modified_since = None
-
         content_length = None
         post_content = ''
 
@@ -232,119 +497,127 @@ class Server:
 
         # Handle HTTP GET requests and validate requested resource
         if method != "GET" and method != "POST":
-            data = "HTTP/1.1 400 Bad Request\r\n\r\nInvalid Request"
+            data = _RESP_400
         elif resource not in self.resources and method == "GET":
-            data = "HTTP/1.1 404 Not Found\r\n\r\nResource Not Found"
+            data = _RESP_404
         else:
-            # Check for If-Modified-Since header
-            for line in request_lines[1:]:
-                if line.startswith("If-Modified-Since:"):
-                    modified_since = line.split(":", 1)[1].strip()
-                    break
-                #elif line.startswith("Content-Length:"):
-                    #content_length = int(line.split(":", 1)[1].strip())
-                    #break
-
-            if modified_since:
-                resource_info = self.resources[resource]
-                modified_since_time = datetime.strptime(modified_since, "%a, %d %b %Y %H:%M:%S GMT")
-                last_modified_time = datetime.strptime(resource_info['last_modified'], "%a, %d %b %Y %H:%M:%S GMT")
-                if last_modified_time <= modified_since_time:
-                    data = "HTTP/1.1 304 Not Modified\r\n\r\n"
+            # Check for If-None-Match and If-Modified-Since headers. A matching ETag means the client's
+            # copy is current, and it takes precedence over the modification date when both are sent
+            none_match = headers.get('if-none-match') if method == "GET" else None
+            modified_since = headers.get('if-modified-since')
+
+            if none_match:
+                if self.resources[resource]['etag'] in (tag.strip().strip('"') for tag in none_match.split(',')):
+                    data = _RESP_304
                 else:
-                    data = f"HTTP/1.1 200 OK\r\nContent-Length: {len(resource_info['data'])}\r\n\r\n" + resource_info['data']
+                    data = self._ok_responses[resource]
+                    flags = 24 # Set ACK and PSH flags for valid response
+            elif modified_since:
+                if self._last_modified_ts[resource] <= _http_date_to_timestamp(modified_since):
+                    data = _RESP_304
+                else:
+                    data = self._ok_responses[resource]
                     flags = 24 # Set ACK and PSH flags for valid response
             elif method == "POST":
-                data = f"HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\nPOST request successfully received."
-                data += "\r\n\r\n"
+                data = _RESP_POST_OK
                 flags = 24
-                post_content += request_lines[3]
+                post_content += request_body if request_body else head_lines[3]
                 new_resource = {
-                    "last_modified": datetime.now().strftime("%a, %d %b %Y %H:%M:%S GMT"),
+                    "last_modified": datetime.now().strftime(_HTTP_DATE_FORMAT),
                     "file_size": len(post_content),
                     "etag":self.newRandomETag(),
                     "data": post_content
                 }
 
-                print(f"MAJ HASKINS3: TCP_SERVER, PROCESS_REQUEST, HANDLING POST, POST_CONTENT: {post_content}")
+                if debug:
+                    log.debug("process_request - handling POST, post_content: %s", post_content)
 
                 # add the post content to the resources.json file (should be a new entry into the dictionary)
                 self.resources[resource] = new_resource
+                self._index_resource(resource, new_resource)
 
                 # write the new resources to the resources.json file
                 self.add_json_entry(self.resources_path, resource, new_resource) # added this line to write the new entry to the resources.json file; https://chatgpt.com/share/675a4f94-a71c-8003-ba56-a39625a5bc09  
 
-                # confirm the new entry was added to the resources.json file with print statement
+                # confirm the new entry was added to the resources.json file
                 if resource in self.resources:
-                    print(f"!!!resource added to resources.json file")
+                    log.debug("resource added to resources.json file")
                 else:
-                    print(f"!!!resource not added to resources.json file")
+                    log.debug("resource not added to resources.json file")
                 
             else:
-                resource_info = self.resources[resource]
-                data = f"HTTP/1.1 200 OK\r\nContent-Length: {len(resource_info['data'])}\r\n\r\n" + resource_info['data']
+                data = self._ok_responses[resource]
                 flags = 24  # Set ACK and PSH flags for valid response
         # Send the response in segments using Go-Back-N
         try:
-            print(f"in tcp_server process_request function - Sending response: {data}")
-            response_bytes = data.encode()
+            if debug:
+                log.debug("process_request - sending response: %r", data)
+            # The response is built as bytes, so segments are memoryview slices of it: no re-encoding,
+            # and the payload is copied only once, straight into the packet
+            response_view = memoryview(data)
             max_data_length = self.frame_size - 60  # Assuming headers take 60 bytes
-            segments = [response_bytes[i:i + max_data_length] for i in range(0, len(response_bytes), max_data_length)]
+            segments = [response_view[i:i + max_data_length] for i in range(0, len(response_view), max_data_length)]
         
+            if self._tx_peer != (dest_ip, dest_port):
+                self._build_template(dest_ip, dest_port)
+
+            # Serialize every segment once up front, with FIN set only on the last one, so sends and
+            # retransmissions just pick packets out of the list
             init_seq_num = self.seq_num
-            print(f"\n***SERVER: number of setments: {len(segments)}***\n")
+            dest_ip_raw = socket.inet_aton(dest_ip)
+            last_flags = 25 if flags == 24 else flags
+            last_index = len(segments) - 1
+            packets = [bytes(self._patch_segment(init_seq_num + index, self.ack_num,
+                                                 last_flags if index == last_index else flags, segment))
+                       for index, segment in enumerate(segments)]
+            encrypted_packets = [None] * len(segments)  # Encrypted variants, built the first time each is sent
+            if debug:
+                log.debug("process_request - number of segments: %d", len(segments))
             while self.base < len(segments):
-                print(f"SERVER: Self.base: {self.base} and len(segments): {len(segments)}")
-                for segment in segments[self.base:min(len(segments), self.base + self.window_size)]:
-                    if self.seq_num - init_seq_num == len(segments) - 1 and flags == 24:
-                        flags = 25  # Set FIN flag on the last segment  
-                    new_datagram = HTTPDatagram(
-                        source_ip=self.server_ip, dest_ip=dest_ip,
-                        source_port=self.server_port, dest_port=dest_port,
-                        seq_num=self.seq_num, ack_num=self.ack_num, flags=flags,
-                        window_size=self.window_size, next_hop=self.gateway, data=segment.decode()
-                    )
-                    print(f"\n****SERVER: about to send self.seq_num = {self.seq_num} ****\n")
-                    self.server_socket.sendto(new_datagram.to_bytes(), (self.gateway, 0))
-                    self.seq_num += 1
+                if debug:
+                    log.debug("process_request - base: %d of %d segments", self.base, len(segments))
+                # Hand the whole window to the kernel in one sendmmsg call
+                window_end = min(len(segments), self.base + self.window_size)
+                sendmmsg(self.server_socket, [(packets[index], (self.gateway, 0)) for index in range(self.base, window_end)])
+                self.seq_num = init_seq_num + window_end
 
                 # Process acknowledgments
                 while self.base < len(segments):
-                    try:
-                        print("*****SERVER: Listening for acknowledgement")
-                        print(f"*****SERVER: Timeout is set to: {self.server_socket.gettimeout()}")
-                        self.server_socket.settimeout(self.timeout)
-                        frame = self.server_socket.recv(self.frame_size)
-                    except socket.timeout:
+                    frame = self._recv_frame(self.timeout)
+                    if frame is None:
                         self.seq_num = self.base + init_seq_num  # Retransmit on timeout
                         break
 
+                    # Skip anything that is not an ACK from the client by peeking at its flags and source
+                    # address, before paying for a full parse
+                    if (len(frame) < HTTPDatagram.PAYLOAD_OFFSET or frame[HTTPDatagram.FLAGS_OFFSET] != 16
+                            or frame[IP_SADDR_OFFSET:IP_SADDR_OFFSET + 4] != dest_ip_raw):
+                        continue
+
                     datagram_fields = HTTPDatagram.from_bytes(frame)
                     # Confirm frame is meant for this application and is an ACK for the oldest sent packet
-                    print(f"\n ****SERVER: range that i'm checking: {range(self.base + init_seq_num + 1, self.base + init_seq_num + self.window_size+1)}****")
-                    print(f"SERVER: Packet received with ACK num: {datagram_fields.ack_num}")
-                    print(f"SERVER: Valid ACK nums are in this range: {list(range(self.base + init_seq_num + 1, self.base + init_seq_num + self.window_size+1))}")
-                    print((datagram_fields.next_hop == self.server_ip), (datagram_fields.ip_saddr == dest_ip), (datagram_fields.flags == 16), (datagram_fields.ack_num in range(self.base + init_seq_num + 1, self.base + init_seq_num + self.window_size+1)))
-                    print(datagram_fields.next_hop)
+                    if debug:
+                        log.debug("process_request - received ACK num %d from %s via %s, valid range: %d-%d",
+                                  datagram_fields.ack_num, datagram_fields.ip_saddr, datagram_fields.next_hop,
+                                  self.base + init_seq_num + 1, self.base + init_seq_num + self.window_size)
                     #if (datagram_fields.next_hop == self.server_ip) and (datagram_fields.ip_saddr == dest_ip) and (datagram_fields.flags == 16) and (datagram_fields.ack_num in range(self.base + init_seq_num + 1, self.base + init_seq_num + self.window_size+1)):
                     if (datagram_fields.ip_saddr == dest_ip) and (datagram_fields.flags == 16) and (datagram_fields.ack_num in range(self.base + init_seq_num + 1, self.base + init_seq_num + self.window_size+1)):
-                    
-                        # send another segment (base + window_size) if necessary
-                        if self.base + self.window_size < len(segments):
-                            segment = segments[self.base + self.window_size]
-                            if self.base == min(len(segments), self.base + self.window_size) - 1 and flags == 24:
-                                flags = 25
-                            new_datagram = HTTPDatagram(source_ip=self.server_ip, dest_ip=dest_ip, source_port=self.server_port, dest_port=dest_port, seq_num=self.seq_num, ack_num=self.ack_num, flags=flags, window_size=self.window_size, next_hop=self.gateway, data=self.f.encrypt(segment).decode())
-                            print(f"\n!!!!!!!SERVER: AFTER ENCRYPTION: {self.f.encrypt(segment).decode()}")
-                            print(f"\n????SERVER: what i'm sending now - self.seq_num: {self.seq_num}\n")
-                            datagram_bytes = new_datagram.to_bytes()
-                            self.server_socket.sendto(datagram_bytes, (self.gateway, 0))
-                            self.seq_num += 1
-                        # increment base
                         # update the base - this will become the latest acknowledgement number
-                        print(f"\n ****SERVER: self.base before being modified: self.base: {self.base} *****\n")
                         self.base += (datagram_fields.ack_num-self.base-1) 
-                        print(f"\n ****SERVER: range that i'm checking - self.seq_num: {self.seq_num} and self.base: {self.base} *****")
+
+                        # send the segments that slid into the window, if any
+                        window_end = min(len(segments), self.base + self.window_size)
+                        for index in range(self.seq_num - init_seq_num, window_end):
+                            if encrypted_packets[index] is None:
+                                encrypted = self.f.encrypt(bytes(segments[index]))
+                                encrypted_packets[index] = bytes(self._patch_segment(
+                                    init_seq_num + index, self.ack_num, last_flags if index == last_index else flags, encrypted))
+                            if debug:
+                                log.debug("process_request - sending encrypted seq_num %d", init_seq_num + index)
+                            self.server_socket.sendto(encrypted_packets[index], (self.gateway, 0))
+                            self.seq_num += 1
+                        if debug:
+                            log.debug("process_request - seq_num: %d, base: %d", self.seq_num, self.base)
                     
         except Exception as e:
             print(f'Error while sending response: {e}')
@@ -357,12 +630,20 @@ class Server:
         self.base = 0
         self.seq_num = 0
         self.ack_num = 0
-        self.server_socket.settimeout(None)
+        self._tx_peer = None
 
     def close_server(self):
         """
-        Closes the server's raw socket.
+        Closes the server's raw socket and its selector, once queued resource writes are done. The
+        receive thread is stopped and waited for first, since it is the one using the selector.
         """
+        self._rx_stop.set()
+        if self._rx_thread is not None:
+            self._rx_thread.join()
+        self._rx_queue.put(_CLOSED)  # Wakes run_server if it is still waiting for a client
+        self._write_queue.put(None)
+        self._writer_thread.join()
+        self._sel.close()
         self.server_socket.close()
 
     def run_server(self, request_list=None):
@@ -372,14 +653,28 @@ class Server:
         Args:
             request_list (list, optional): List to append incoming requests (used for debugging).
         """
-        connected = self.accept_handshake()
-        if connected:
-            request, port, ip = self.receive_request_segments()
-            print(request)
-            if request_list is not None:
-                request_list.append(request)
-            self.process_request(request, port, ip)
+        self.finished.clear()
+        # Frames are pulled off the socket on a separate thread, so the kernel copy overlaps the
+        # protocol work done on this one
+        self._rx_stop.clear()
+        self._rx_thread = threading.Thread(target=self.receive_frames, daemon=True)
+        self._rx_thread.start()
+        self.ready.set()  # The socket is bound in __init__, so the server can accept from here on
+        try:
+            connected = self.accept_handshake()
+            if connected:
+                request, port, ip = self.receive_request_segments()
+                log.debug("run_server - request: %r", request)
+                if request_list is not None:
+                    request_list.append(request)
+                self.process_request(request, port, ip)
+        except OSError:
+            print('The server was closed before a request completed.')
         self.reset_connection()
+        self._rx_stop.set()
+        self._rx_thread.join()
+        self._write_queue.join()  # The response has gone out; report finished once POSTs are on disk
+        self.finished.set()
 
 
 if __name__ == "__main__":